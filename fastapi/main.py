@@ -2,20 +2,38 @@
 FastAPI - Ingestão de Dados Meteorológicos do INMET
 Endpoints: /fetch_inmet, /upload, /store
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, BackgroundTasks
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
+import json
 import pandas as pd
 from datetime import datetime
 from typing import Optional
-import boto3
-from botocore.client import Config
 import requests
 from io import BytesIO
 import logging
 import os
 import io
 from fastapi import APIRouter
+import asyncio
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+# Pacote compartilhado com os notebooks (montado em /app/weather)
+from weather import find_inmet_header
+from weather.compression import (
+    compress_bytes,
+    compressor,
+    content_encoding_args,
+    normalize_encoding,
+)
+from weather.resources import get_engine, get_s3_client
 
 router = APIRouter()
 
@@ -29,28 +47,271 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Configuração MinIO
-MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
-MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
-MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
-
-# Cliente S3 (MinIO)
-s3_client = boto3.client(
-    's3',
-    endpoint_url=f'http://{MINIO_ENDPOINT}',
-    aws_access_key_id=MINIO_ACCESS_KEY,
-    aws_secret_access_key=MINIO_SECRET_KEY,
-    config=Config(signature_version='s3v4'),
-    region_name='us-east-1'
+# Pool de threads para chamadas bloqueantes (boto3, requests, pandas), para
+# não travar o event loop. O /health usa um pool próprio e fica responsivo
+# mesmo com o pool principal ocupado por uploads.
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+health_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health")
+
+# Conexões compartilhadas com os notebooks (weather/resources.py): cliente S3
+# com uma conexão HTTP por thread do io_executor e engine do PostgreSQL com
+# pool, criado só no primeiro uso
+s3_client = get_s3_client(max_pool_connections=IO_WORKERS + 1)
+
+# Configuração do upload em streaming
+HEADER_SCAN_BYTES = 64 * 1024          # bytes inspecionados para achar o cabeçalho "Data;Hora"
+UPLOAD_CHUNK_SIZE = 1024 * 1024        # leitura do arquivo recebido em blocos de 1 MB
+MULTIPART_PART_SIZE = 8 * 1024 * 1024  # S3 exige partes de no mínimo 5 MB (exceto a última)
+
+# Uploads endereçados por conteúdo: o objeto fica em raw/sha256/<xx>/<hash>.csv,
+# com o hash calculado sobre o arquivo inteiro (bloco de metadados da estação,
+# cabeçalho e linhas de dados). O mesmo arquivo enviado de novo só atualiza o
+# índice raw_file_index no PostgreSQL.
+CONTENT_KEY_PREFIX = "sha256/"
+
+# Ingestão em lote da pasta de dados montada (/upload_all_data): arquivos
+# enviados em paralelo e, acima de MULTIPART_PART_SIZE, em partes paralelas
+DATA_FOLDER = os.getenv("DATA_FOLDER", "/app/data")
+BULK_UPLOAD_WORKERS = int(os.getenv("BULK_UPLOAD_WORKERS", "4"))
+BULK_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_PART_SIZE,
+    multipart_chunksize=MULTIPART_PART_SIZE,
+    max_concurrency=4,
 )
+MAX_INGEST_JOBS = 20  # jobs mantidos em memória para consulta
+
+
+async def run_blocking(func, *args, executor: ThreadPoolExecutor = None, **kwargs):
+    """
+    Executa uma função bloqueante no pool de threads e aguarda o resultado
+    sem bloquear o event loop
 
-# Configuração PostgreSQL
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres")
-POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "weather_db")
+    Args:
+        func: Função a ser executada
+        executor: Pool de threads (padrão: io_executor)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor or io_executor, partial(func, *args, **kwargs))
+
+
+def dataframe_to_csv_buffer(df: pd.DataFrame) -> BytesIO:
+    """
+    Serializa um DataFrame como CSV (;, latin1) em memória, comprimido
+    conforme RAW_COMPRESSION (ver weather.compression)
+    """
+    csv_buffer = BytesIO()
+    df.to_csv(csv_buffer, index=False, sep=';', encoding='latin1')
+    return BytesIO(compress_bytes(csv_buffer.getvalue()))
 
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+
+class MultipartWriter:
+    """
+    Envia bytes para o MinIO em partes (S3 multipart upload), mantendo
+    em memória no máximo uma parte por vez. Os bytes são comprimidos em
+    streaming conforme content_encoding (padrão: RAW_COMPRESSION).
+    """
+
+    def __init__(self, bucket: str, key: str, content_type: str = 'text/csv',
+                 content_encoding: str = None):
+        self.bucket = bucket
+        self.key = key
+        self.parts = []
+        self.buffer = bytearray()
+        self.size = 0
+        self.compress = compressor(content_encoding)
+        response = s3_client.create_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            ContentType=content_type,
+            **content_encoding_args(content_encoding)
+        )
+        self.upload_id = response['UploadId']
+
+    def write(self, data: bytes):
+        if self.compress:
+            data = self.compress.compress(data)
+        self.buffer += data
+        if len(self.buffer) >= MULTIPART_PART_SIZE:
+            self._flush_part()
+
+    def _flush_part(self):
+        part_number = len(self.parts) + 1
+        response = s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=bytes(self.buffer)
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        self.size += len(self.buffer)
+        self.buffer.clear()
+
+    def complete(self):
+        if self.compress:
+            self.buffer += self.compress.flush()
+        # A última parte pode ser menor que 5 MB; um arquivo vazio ainda precisa de uma parte
+        if self.buffer or not self.parts:
+            self._flush_part()
+        s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': self.parts}
+        )
+
+    def abort(self):
+        s3_client.abort_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id
+        )
+
+
+async def read_inmet_head(file: UploadFile) -> tuple:
+    """
+    Lê o início de um CSV do INMET até encontrar o cabeçalho "Data;Hora",
+    inspecionando no máximo HEADER_SCAN_BYTES; se ele não for encontrado, a
+    primeira linha é tratada como cabeçalho
+
+    Returns:
+        Tupla (bytes lidos, posição do cabeçalho)
+    """
+    # Ler apenas o início do arquivo para localizar o cabeçalho
+    head = b''
+    eof = False
+    header_offset = -1
+    while len(head) < HEADER_SCAN_BYTES:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            break
+        head += chunk
+        header_offset = find_inmet_header(head[:HEADER_SCAN_BYTES], complete=False)
+        if header_offset >= 0:
+            break
+
+    if not head.strip():
+        raise HTTPException(status_code=400, detail="Arquivo CSV vazio ou inválido")
+
+    if header_offset < 0:
+        header_offset = find_inmet_header(head, complete=eof)
+    if header_offset < 0:
+        header_offset = 0
+    return head, header_offset
+
+
+def content_key(content_hash: str) -> str:
+    """Nome do objeto no bucket raw para um hash SHA-256 de conteúdo"""
+    return f"{CONTENT_KEY_PREFIX}{content_hash[:2]}/{content_hash}.csv"
+
+
+async def hash_csv_data(file: UploadFile) -> str:
+    """
+    SHA-256 de um CSV do INMET, lido em blocos. O bloco de metadados da
+    estação entra no hash: as mesmas medições enviadas para outra estação
+    são outro conteúdo. O arquivo volta para o início ao final.
+    """
+    digest = hashlib.sha256()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+def record_raw_upload(original_filename: str, content_hash: str, key: str):
+    """
+    Registra no índice raw_file_index qual conteúdo (hash) corresponde a um
+    nome de arquivo enviado, contando os reenvios
+    """
+    from sqlalchemy import text
+
+    query = text("""
+        INSERT INTO raw_file_index (original_filename, content_sha256, object_key)
+        VALUES (:filename, :content_hash, :key)
+        ON CONFLICT (original_filename) DO UPDATE SET
+            content_sha256 = EXCLUDED.content_sha256,
+            object_key = EXCLUDED.object_key,
+            upload_count = raw_file_index.upload_count + 1,
+            last_uploaded_at = NOW()
+    """)
+    with get_engine().begin() as conn:
+        conn.execute(query, {"filename": original_filename, "content_hash": content_hash, "key": key})
+
+
+async def stream_csv_to_minio(file: UploadFile, bucket: str, key: str, metadata_columns: dict) -> int:
+    """
+    Copia um CSV do INMET para o MinIO em blocos, acrescentando as colunas de
+    metadados em cada linha sem montar DataFrame.
+
+    O bloco de metadados da estação (REGIAO, UF, ESTACAO...) que antecede o
+    cabeçalho é preservado como está. Apenas os primeiros HEADER_SCAN_BYTES
+    são inspecionados para localizar o cabeçalho; se ele não for encontrado,
+    a primeira linha é tratada como cabeçalho.
+
+    Args:
+        file: Arquivo recebido no upload
+        bucket: Bucket de destino
+        key: Nome do objeto no bucket
+        metadata_columns: Colunas extras (nome -> valor) adicionadas a cada linha
+
+    Returns:
+        Número de registros (linhas de dados) gravados
+    """
+    head, header_offset = await read_inmet_head(file)
+
+    header_end = head.find(b'\n', header_offset)
+    if header_end < 0:
+        header_end = len(head)
+    header_line = head[header_offset:header_end]
+
+    # Preservar o terminador de linha original (\n ou \r\n)
+    newline = b'\r\n' if header_line.endswith(b'\r') else b'\n'
+    header_line = header_line.rstrip(b'\r')
+
+    header_suffix = ''.join(f";{name}" for name in metadata_columns).encode('latin1', errors='replace')
+    row_suffix = ''.join(f";{value}" for value in metadata_columns.values()).encode('latin1', errors='replace')
+
+    writer = await run_blocking(MultipartWriter, bucket, key)
+    records = 0
+    try:
+        await run_blocking(writer.write, head[:header_offset])
+        await run_blocking(writer.write, header_line + header_suffix + newline)
+
+        pending = head[header_end + 1:]
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if chunk:
+                pending += chunk
+                cut = pending.rfind(b'\n')
+                if cut < 0:
+                    continue
+                lines, pending = pending[:cut + 1], pending[cut + 1:]
+            else:
+                # Última linha pode não terminar com quebra de linha
+                lines, pending = pending, b''
+                if not lines.strip():
+                    lines = b''
+                elif not lines.endswith(b'\n'):
+                    lines += newline
+
+            if lines:
+                records += lines.count(b'\n')
+                await run_blocking(writer.write, lines.replace(newline, row_suffix + newline))
+
+            if not chunk:
+                break
+
+        await run_blocking(writer.complete)
+    except Exception:
+        await run_blocking(writer.abort)
+        raise
+
+    return records
 
 
 @app.get("/")
@@ -62,6 +323,7 @@ async def root():
             "/fetch_inmet": "Baixar dados do INMET",
             "/upload": "Upload de arquivo CSV",
             "/store": "Armazenar dados no MinIO",
+            "/upload_all_data": "Ingestão em lote da pasta de dados (job em segundo plano)",
             "/health": "Health check"
         }
     }
@@ -72,11 +334,25 @@ async def health():
     """Health check"""
     try:
         # Verificar conexão com MinIO
-        s3_client.list_buckets()
-        return {"status": "healthy", "minio": "connected"}
+        await run_blocking(s3_client.list_buckets, executor=health_executor)
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
+    # PostgreSQL (informativo): uma conexão do pool, validada pelo pre-ping
+    try:
+        await run_blocking(check_postgres, executor=health_executor)
+        postgres = "connected"
+    except Exception as e:
+        logger.warning(f"PostgreSQL indisponível: {str(e)}")
+        postgres = "unavailable"
+
+    return {"status": "healthy", "minio": "connected", "postgres": postgres}
+
+
+def check_postgres():
+    with get_engine().connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
 
 @app.post("/fetch_inmet")
 async def fetch_inmet(
@@ -105,12 +381,12 @@ async def fetch_inmet(
         
         logger.info(f"Buscando dados do INMET: {url}")
         
-        response = requests.get(url, timeout=30)
+        response = await run_blocking(requests.get, url, timeout=30)
         response.raise_for_status()
         
         # Converter resposta para DataFrame
         data = response.json()
-        df = pd.DataFrame(data)
+        df = await run_blocking(pd.DataFrame, data)
         
         # Adicionar metadados
         df['ingestion_date'] = datetime.now().isoformat()
@@ -120,15 +396,14 @@ async def fetch_inmet(
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"inmet_data_{timestamp}.csv"
         
-        csv_buffer = BytesIO()
-        df.to_csv(csv_buffer, index=False, sep=';', encoding='latin1')
-        csv_buffer.seek(0)
+        csv_buffer = await run_blocking(dataframe_to_csv_buffer, df)
         
-        s3_client.upload_fileobj(
+        await run_blocking(
+            s3_client.upload_fileobj,
             csv_buffer,
             'raw',
             filename,
-            ExtraArgs={'ContentType': 'text/csv'}
+            ExtraArgs={'ContentType': 'text/csv', **content_encoding_args()}
         )
         
         logger.info(f"Dados salvos no MinIO: raw/{filename}")
@@ -152,7 +427,8 @@ async def fetch_inmet(
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     """
-    Recebe arquivo CSV via upload
+    Recebe arquivo CSV via upload e grava no MinIO em streaming
+    (multipart), com memória constante por requisição
     
     Args:
         file: Arquivo CSV a ser enviado
@@ -162,69 +438,44 @@ async def upload_file(file: UploadFile = File(...)):
         if not file.filename.endswith(('.csv', '.CSV')):
             raise HTTPException(status_code=400, detail="Apenas arquivos CSV são aceitos")
         
-        # Ler arquivo
-        contents = await file.read()
-        # Arquivos do INMET têm metadados nas primeiras linhas, precisamos encontrar onde começam os dados
-        content_str = contents.decode('latin1')
-        lines = content_str.split('\n')
-        
-        # Procurar linha que começa com "Data" (cabeçalho)
-        header_line = None
-        for i, line in enumerate(lines):
-            if line.strip().startswith('Data') and 'Hora' in line:
-                header_line = i
-                break
-        
-        if header_line is None:
-            # Se não encontrar, tentar ler normalmente
-            header_line = 0
-        
-        # Ler CSV pulando as linhas de metadados
+        # Nome do objeto pelo conteúdo: um reenvio do mesmo arquivo não gera
+        # outra cópia no raw/ (nem registros duplicados no processamento)
+        content_hash = await hash_csv_data(file)
+        filename = content_key(content_hash)
+        duplicate = await run_blocking(remote_etag, 'raw', filename) is not None
+
+        records = None
+        if not duplicate:
+            # Salvar no MinIO em streaming (multipart), sem carregar o arquivo inteiro
+            metadata_columns = {
+                'ingestion_date': datetime.now().isoformat(),
+                'source': 'upload',
+                'original_filename': file.filename,
+            }
+            records = await stream_csv_to_minio(file, 'raw', filename, metadata_columns)
+            logger.info(f"Arquivo salvo no MinIO: raw/{filename} ({file.filename})")
+        else:
+            logger.info(f"Conteúdo já existente no MinIO: raw/{filename} ({file.filename})")
+
         try:
-            df = pd.read_csv(
-                BytesIO(contents), 
-                sep=';', 
-                encoding='latin1', 
-                skiprows=header_line,
-                on_bad_lines='skip', 
-                engine='python'
-            )
+            await run_blocking(record_raw_upload, file.filename, content_hash, filename)
         except Exception as e:
-            logger.error(f"Erro ao ler CSV: {str(e)}")
-            raise HTTPException(status_code=400, detail=f"Erro ao ler arquivo CSV: {str(e)}")
-        
-        # Adicionar metadados
-        df['ingestion_date'] = datetime.now().isoformat()
-        df['source'] = 'upload'
-        df['original_filename'] = file.filename
-        
-        # Salvar no MinIO
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"upload_{timestamp}_{file.filename}"
-        
-        csv_buffer = BytesIO()
-        df.to_csv(csv_buffer, index=False, sep=';', encoding='latin1')
-        csv_buffer.seek(0)
-        
-        s3_client.upload_fileobj(
-            csv_buffer,
-            'raw',
-            filename,
-            ExtraArgs={'ContentType': 'text/csv'}
-        )
-        
-        logger.info(f"Arquivo salvo no MinIO: raw/{filename}")
-        
+            # O índice é informativo: o objeto no MinIO já está correto
+            logger.warning(f"Não foi possível registrar {file.filename} em raw_file_index: {str(e)}")
+
         return {
             "status": "success",
-            "message": f"Arquivo enviado e salvo no MinIO",
+            "message": "Arquivo já existente no MinIO" if duplicate else "Arquivo enviado e salvo no MinIO",
             "filename": filename,
-            "records": len(df),
+            "original_filename": file.filename,
+            "content_sha256": content_hash,
+            "duplicate": duplicate,
+            "records": records,
             "bucket": "raw"
         }
         
-    except pd.errors.EmptyDataError:
-        raise HTTPException(status_code=400, detail="Arquivo CSV vazio ou inválido")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao processar upload: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
@@ -254,18 +505,17 @@ async def store_data(
             )
         
         # Converter dados para DataFrame e depois CSV
-        df = pd.DataFrame(data)
+        df = await run_blocking(pd.DataFrame, data)
         df['storage_date'] = datetime.now().isoformat()
         
-        csv_buffer = BytesIO()
-        df.to_csv(csv_buffer, index=False, sep=';', encoding='latin1')
-        csv_buffer.seek(0)
+        csv_buffer = await run_blocking(dataframe_to_csv_buffer, df)
         
-        s3_client.upload_fileobj(
+        await run_blocking(
+            s3_client.upload_fileobj,
             csv_buffer,
             bucket,
             filename,
-            ExtraArgs={'ContentType': 'text/csv'}
+            ExtraArgs={'ContentType': 'text/csv', **content_encoding_args()}
         )
         
         logger.info(f"Dados armazenados no MinIO: {bucket}/{filename}")
@@ -283,69 +533,267 @@ async def store_data(
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
 
 
+def format_object(obj: dict) -> dict:
+    """Converte um item do list_objects_v2 para a resposta do /list_files"""
+    return {
+        "filename": obj['Key'],
+        "size": obj['Size'],
+        "last_modified": obj['LastModified'].isoformat()
+    }
+
+
 @app.get("/list_files")
-async def list_files(bucket: str = "raw"):
+async def list_files(
+    bucket: str = "raw",
+    prefix: str = "",
+    max_keys: int = Query(1000, ge=1, le=1000),
+    continuation_token: Optional[str] = None,
+    stream: bool = False
+):
     """
     Lista arquivos em um bucket do MinIO
+
+    Args:
+        bucket: Nome do bucket
+        prefix: Lista apenas chaves com esse prefixo
+        max_keys: Chaves por página (máximo 1.000)
+        continuation_token: Token devolvido pela página anterior
+        stream: Se True, percorre todas as páginas e devolve um objeto por
+            linha (NDJSON), sem montar a listagem inteira em memória
     """
+    if stream:
+        return StreamingResponse(
+            stream_object_listing(bucket, prefix, max_keys),
+            media_type="application/x-ndjson"
+        )
+
     try:
-        response = s3_client.list_objects_v2(Bucket=bucket)
+        params = {'Bucket': bucket, 'Prefix': prefix, 'MaxKeys': max_keys}
+        if continuation_token:
+            params['ContinuationToken'] = continuation_token
+        response = await run_blocking(s3_client.list_objects_v2, **params)
         
-        files = []
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                files.append({
-                    "filename": obj['Key'],
-                    "size": obj['Size'],
-                    "last_modified": obj['LastModified'].isoformat()
-                })
+        files = [format_object(obj) for obj in response.get('Contents', [])]
         
         return {
             "bucket": bucket,
+            "prefix": prefix,
             "count": len(files),
-            "files": files
+            "files": files,
+            "is_truncated": response.get('IsTruncated', False),
+            "next_continuation_token": response.get('NextContinuationToken')
         }
         
     except Exception as e:
         logger.error(f"Erro ao listar arquivos: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
-    
 
 
-@router.post("/upload_all_data")
-async def upload_all_data():
-    base_folder = "/app/data"
-    uploaded_files = []
+async def stream_object_listing(bucket: str, prefix: str, page_size: int):
+    """
+    Gera a listagem de um bucket em NDJSON, uma página do list_objects_v2
+    por vez (memória limitada a uma página)
+    """
+    params = {'Bucket': bucket, 'Prefix': prefix, 'MaxKeys': page_size}
+    try:
+        while True:
+            response = await run_blocking(s3_client.list_objects_v2, **params)
+            for obj in response.get('Contents', []):
+                yield json.dumps(format_object(obj)) + "\n"
+            if not response.get('IsTruncated'):
+                break
+            params['ContinuationToken'] = response['NextContinuationToken']
+    except Exception as e:
+        # O status HTTP já foi enviado; sinalizar o erro na última linha
+        logger.error(f"Erro ao listar arquivos: {str(e)}")
+        yield json.dumps({"error": str(e)}) + "\n"
+
+
+# Jobs de ingestão em lote (job_id -> estado), protegidos por ingest_lock
+ingest_jobs = {}
+ingest_lock = threading.Lock()
 
+
+def hash_file(path: str) -> str:
+    """SHA-256 de um arquivo local, lido em blocos (mesmo hash de hash_csv_data)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(partial(f.read, UPLOAD_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def remote_etag(bucket: str, key: str) -> Optional[str]:
+    """ETag do objeto no MinIO, ou None se ele não existe"""
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+
+
+def find_data_files(base_folder: str) -> list:
+    """
+    CSVs da pasta de dados como (caminho, nome relativo à pasta, ex.:
+    dados_2021/dados_recife_2021.CSV)
+    """
+    found = []
     for root, dirs, files in os.walk(base_folder):
-        for filename in files:
+        dirs.sort()
+        for filename in sorted(files):
             # Aceita .csv e .CSV etc.
             if filename.lower().endswith(".csv"):
                 full_path = os.path.join(root, filename)
+                name = os.path.relpath(full_path, base_folder).replace(os.sep, "/")
+                found.append((full_path, name))
+    return found
+
+
+def ingest_file(full_path: str, name: str, bucket: str = "raw") -> tuple:
+    """
+    Envia um arquivo ao MinIO no mesmo objeto endereçado por conteúdo do
+    /upload (content_key), pulando-o se o conteúdo já existe, e o registra
+    em raw_file_index com o nome relativo à pasta de dados
+
+    Returns:
+        Tupla ('uploaded' ou 'skipped', tamanho em bytes)
+    """
+    size = os.path.getsize(full_path)
+    content_hash = hash_file(full_path)
+    key = content_key(content_hash)
+
+    result = "skipped"
+    if remote_etag(bucket, key) is None:
+        with open(full_path, "rb") as f:
+            # Com RAW_COMPRESSION o arquivo é comprimido em memória antes do envio
+            body = BytesIO(compress_bytes(f.read())) if normalize_encoding() else f
+            s3_client.upload_fileobj(
+                body, bucket, key,
+                ExtraArgs={"ContentType": "text/csv", **content_encoding_args()},
+                Config=BULK_TRANSFER_CONFIG
+            )
+        result = "uploaded"
+
+    try:
+        record_raw_upload(name, content_hash, key)
+    except Exception as e:
+        # O índice é informativo: o objeto no MinIO já está correto
+        logger.warning(f"Não foi possível registrar {name} em raw_file_index: {str(e)}")
+    return result, size
 
-                try:
-                    # Abrir arquivo como bytes
-                    with open(full_path, "rb") as f:
-                        s3_client.upload_fileobj(
-                            f,
-                            "raw",      # bucket
-                            filename    # nome do arquivo no bucket
-                        )
 
-                    uploaded_files.append(filename)
+def job_status(job: dict) -> dict:
+    """Cópia do estado de um job com tempo decorrido e vazão"""
+    with ingest_lock:
+        status = {**job, "errors": list(job["errors"])}
+    elapsed = status["elapsed_seconds"]
+    if status["status"] == "running":
+        elapsed = (datetime.now() - datetime.fromisoformat(status["started_at"])).total_seconds()
+    status["elapsed_seconds"] = round(elapsed, 2)
+    status["mb_per_second"] = round(status["bytes_uploaded"] / 1024 / 1024 / elapsed, 2) if elapsed else None
+    return status
 
+
+def run_ingest_job(job_id: str, base_folder: str):
+    """
+    Executa um job de ingestão (em segundo plano): envia os CSVs em paralelo,
+    registrando sucesso, arquivo já existente ou erro de cada um sem
+    interromper os demais
+    """
+    job = ingest_jobs[job_id]
+    start = datetime.now()
+    try:
+        files = find_data_files(base_folder)
+        with ingest_lock:
+            job["total_files"] = len(files)
+
+        with ThreadPoolExecutor(max_workers=BULK_UPLOAD_WORKERS, thread_name_prefix="ingest") as pool:
+            futures = {pool.submit(ingest_file, path, name): name for path, name in files}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result, size = future.result()
                 except Exception as e:
-                    return {
-                        "status": "error",
-                        "file": filename,
-                        "error": str(e)
-                    }
+                    logger.error(f"Erro ao enviar {name}: {str(e)}")
+                    with ingest_lock:
+                        job["failed"] += 1
+                        job["errors"].append({"file": name, "error": str(e)})
+                    continue
+                with ingest_lock:
+                    if result == "uploaded":
+                        job["uploaded"] += 1
+                        job["bytes_uploaded"] += size
+                    else:
+                        job["skipped"] += 1
 
-    return {
-        "status": "success",
-        "total_uploaded": len(uploaded_files),
-        "files": uploaded_files
-    }
+        final_status = "completed_with_errors" if job["failed"] else "completed"
+    except Exception as e:
+        logger.error(f"Erro no job de ingestão {job_id}: {str(e)}")
+        with ingest_lock:
+            job["errors"].append({"file": None, "error": str(e)})
+        final_status = "failed"
+
+    with ingest_lock:
+        job["status"] = final_status
+        job["finished_at"] = datetime.now().isoformat()
+        job["elapsed_seconds"] = (datetime.now() - start).total_seconds()
+    logger.info(
+        f"Job de ingestão {job_id}: {job['uploaded']} enviados, "
+        f"{job['skipped']} já existentes, {job['failed']} com erro"
+    )
+
+
+@router.post("/upload_all_data", status_code=202)
+async def upload_all_data(background_tasks: BackgroundTasks):
+    """
+    Inicia a ingestão em segundo plano de todos os CSVs da pasta de dados
+    montada (DATA_FOLDER) no bucket raw, com as mesmas chaves endereçadas
+    por conteúdo do /upload. Arquivos já presentes com o mesmo conteúdo
+    (enviados por qualquer dos dois) são pulados. Retorna o job
+    imediatamente; acompanhe em GET /upload_all_data/{job_id}. Se já houver
+    um job em andamento, ele é retornado em vez de iniciar outro.
+    """
+    with ingest_lock:
+        running = next((job for job in ingest_jobs.values() if job["status"] == "running"), None)
+        if running is None:
+            job_id = uuid.uuid4().hex[:12]
+            running = ingest_jobs[job_id] = {
+                "job_id": job_id,
+                "status": "running",
+                "folder": DATA_FOLDER,
+                "total_files": None,
+                "uploaded": 0,
+                "skipped": 0,
+                "failed": 0,
+                "bytes_uploaded": 0,
+                "errors": [],
+                "started_at": datetime.now().isoformat(),
+                "finished_at": None,
+                "elapsed_seconds": 0.0,
+            }
+            # Descarta os jobs concluídos mais antigos
+            for old_id in list(ingest_jobs)[:-MAX_INGEST_JOBS]:
+                if ingest_jobs[old_id]["status"] != "running":
+                    del ingest_jobs[old_id]
+            background_tasks.add_task(run_ingest_job, job_id, DATA_FOLDER)
+            logger.info(f"Job de ingestão {job_id} iniciado: {DATA_FOLDER}")
+
+    status = job_status(running)
+    status["status_url"] = f"/upload_all_data/{status['job_id']}"
+    return status
+
+
+@router.get("/upload_all_data/{job_id}")
+async def upload_all_data_status(job_id: str):
+    """
+    Progresso de um job de ingestão em lote: arquivos enviados, pulados
+    (conteúdo já existente) e com erro, bytes enviados e vazão
+    """
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+    return job_status(job)
 
 
 app.include_router(router)
@@ -3,172 +3,143 @@ Script de processamento e limpeza de dados
 Lê dados do MinIO (raw), processa e salva em processed e PostgreSQL
 """
 
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from utils import (
-    read_from_minio,
-    write_to_minio,
-    write_to_postgres,
-    list_minio_files
+    download_from_minio,
+    write_parquet_partitions,
+    copy_to_postgres,
+    prepare_weather_hourly,
+    record_station_outages,
+    file_station,
+    delete_from_minio,
+    list_minio_objects,
+    list_pending_files,
+    get_original_filenames,
+    record_file_manifest,
+    daily_keys,
+    get_file_daily_keys,
+    refresh_weather_daily,
+    refresh_rollups,
+    WEATHER_HOURLY_KEY
 )
+from weather import normalize_inmet_file
 
-# ============================================================
-# FUNÇÃO PRINCIPAL DE LIMPEZA
-# ============================================================
-
-def clean_weather_data(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Limpa e trata dados meteorológicos, preservando DATA + HORA corretamente
-    e preservando números (corrige vírgula decimal -> ponto).
-    """
-
-    df_clean = df.copy()
-
-    # ============================================================
-    # 1. Mapear nomes de colunas para nomes padronizados
-    # ============================================================
-
-    column_mapping = {
-        # INMET
-        'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)': 'temperatura',
-        'UMIDADE RELATIVA DO AR, HORARIA (%)': 'umidade_relativa',
-        'VENTO, VELOCIDADE HORARIA (m/s)': 'velocidade_vento',
-        'RADIAÇÃO GLOBAL (Kj/m²)': 'radiacao_solar',
-        'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'precipitacao',
-        'ESTACAO': 'estacao',
-        'UF': 'estado',
-        'NOME': 'cidade',
-
-        # Cabrobó 2020
-        'TempBulboSeco': 'temperatura',
-        'UmidadeRelativa': 'umidade_relativa',
-        'VelocidadeVento': 'velocidade_vento',
-        'RadiacaoGlobal': 'radiacao_solar',
-        'Precipitacao': 'precipitacao',
-    }
-
-    df_clean = df_clean.rename(columns=column_mapping)
-
-    # ============================================================
-    # 2. Construção / detecção da coluna data_hora
-    # ============================================================
-
-    # Se já existe data_hora, usa ela
-    if "data_hora" in df_clean.columns:
-        df_clean["data_hora"] = pd.to_datetime(df_clean["data_hora"], errors="coerce")
-
-    # Caso INMET tradicional: Data + Hora UTC
-    elif "Data" in df_clean.columns and "Hora UTC" in df_clean.columns:
-        hora_str = (
-            df_clean["Hora UTC"]
-            .astype(str)
-            .str.replace(" UTC", "", regex=False)
-            .str.zfill(4)
-        )
-        df_clean["data_hora"] = pd.to_datetime(
-            df_clean["Data"].astype(str) + " " + hora_str,
-            format="%Y/%m/%d %H%M",
-            errors="coerce"
-        )
-
-    # Caso exista só Data
-    elif "Data" in df_clean.columns:
-        df_clean["data_hora"] = pd.to_datetime(df_clean["Data"], errors="coerce")
-
-    # Caso exista DATA (maiúsculo)
-    elif "DATA" in df_clean.columns:
-        df_clean["data_hora"] = pd.to_datetime(df_clean["DATA"], errors="coerce")
-
-    else:
-        raise ValueError("Nenhuma coluna de data encontrada no arquivo!")
-
-    # Remover registros sem data válida
-    df_clean = df_clean.dropna(subset=["data_hora"])
-
-    # ============================================================
-    # 3. Normalização dos valores numéricos (com vírgula → ponto)
-    # ============================================================
-
-    numeric_columns = [
-        "temperatura", "umidade_relativa", "pressao_atmosferica",
-        "direcao_vento", "velocidade_vento", "radiacao_solar", "precipitacao"
-    ]
-
-    for col in numeric_columns:
-        if col in df_clean.columns:
-            # transforma tudo em string
-            s = df_clean[col].astype(str).str.strip()
-
-            # remove valores inválidos comuns
-            s = s.replace({"": None, "nan": None, "NaN": None, "-": None})
-
-            # vírgula decimal → ponto decimal
-            s = s.str.replace(",", ".", regex=False)
-
-            # converte finalmente para número
-            df_clean[col] = pd.to_numeric(s, errors="coerce")
-
-    # ============================================================
-    # 4. Quebrar data em partes
-    # ============================================================
-
-    df_clean["ano"] = df_clean["data_hora"].dt.year
-    df_clean["mes"] = df_clean["data_hora"].dt.month
-    df_clean["dia"] = df_clean["data_hora"].dt.day
-    df_clean["hora"] = df_clean["data_hora"].dt.hour
-
-    # ============================================================
-    # 5. Manter somente colunas relevantes (as que realmente existem)
-    # ============================================================
-
-    relevant_columns = [
-        "data_hora", "estacao", "cidade", "estado",
-        "temperatura", "umidade_relativa", "pressao_atmosferica",
-        "direcao_vento", "velocidade_vento", "radiacao_solar",
-        "precipitacao", "ano", "mes", "dia", "hora"
-    ]
-
-    existing_cols = [c for c in relevant_columns if c in df_clean.columns]
-
-    return df_clean[existing_cols]
-
+# Número de processos usados na limpeza (padrão: núcleos disponíveis)
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", os.cpu_count() or 1))
 
 # ============================================================
 # PROCESSAMENTO COMPLETO DOS ARQUIVOS RAW
 # ============================================================
 
-def process_raw_files():
+def save_processed(df_clean: pd.DataFrame, obj: dict):
+    """
+    Etapa de escrita do pipeline: grava o DataFrame limpo no MinIO
+    (processed/estacao=<x>/ano=<y>/part.parquet), no PostgreSQL, registra
+    os intervalos sem medição em station_outages, recalcula weather_daily e
+    os rollups para os dias afetados e atualiza o manifesto
+    """
+    filename = obj["key"]
+    # Registra a estação primeiro: df_clean passa a usar o nome canônico
+    hourly = prepare_weather_hourly(df_clean)
+    write_parquet_partitions(df_clean, "processed")
+    if df_clean.empty and obj.get("reprocess"):
+        # Arquivo só com horas sem medição: remove as partições gravadas antes
+        estacao = file_station(df_clean, filename)
+        anos = {inicio[:4] for inicio, _, _ in df_clean.attrs.get("outages", [])}
+        delete_from_minio("processed", [f"estacao={estacao}/ano={ano}/part.parquet" for ano in sorted(anos)])
+
+    days = daily_keys(df_clean)
+    if obj.get("reprocess"):
+        days |= get_file_daily_keys(filename)
+    copy_to_postgres(
+        hourly, "weather_hourly",
+        key_columns=WEATHER_HOURLY_KEY,
+        replace_file=filename if obj.get("reprocess") else None
+    )
+    record_station_outages(df_clean, filename)
+    refresh_weather_daily(days)
+    refresh_rollups(days)
+    record_file_manifest(filename, "raw", obj["etag"], obj["size"], len(df_clean))
+
+
+def process_raw_files(incremental: bool = True, workers: int = None):
+    """
+    Processa os arquivos do bucket raw/ para processed/ e weather_hourly.
+
+    No modo incremental (padrão), só são processados arquivos novos ou cujo
+    ETag mudou desde o último processamento, segundo o manifesto em
+    file_metadata. Um arquivo alterado tem seus registros antigos substituídos.
+    Sem incremental, todos os arquivos são reprocessados dessa forma.
+
+    Os arquivos são independentes e passam por um pipeline: download,
+    leitura + limpeza em um pool de processos (`workers`) e escrita no
+    MinIO/PostgreSQL em um pool de threads. Cada thread conduz um arquivo
+    por vez, então há no máximo 2 * workers arquivos em memória e o I/O de
+    uns se sobrepõe ao processamento de outros. Com workers=1 tudo roda
+    sequencialmente no processo atual.
+    """
+    workers = workers or PROCESSING_WORKERS
     print("Iniciando processamento de dados...")
 
-    raw_files = list_minio_files("raw")
-    print(f"Encontrados {len(raw_files)} arquivos no bucket raw/")
-
-    all_processed = []
-
-    for filename in raw_files:
+    if incremental:
+        raw_objects = list_pending_files("raw")
+        print(f"Encontrados {len(raw_objects)} arquivos novos ou alterados no bucket raw/")
+    else:
+        # Carga completa: todos os arquivos substituem os registros já carregados
+        raw_objects = [{**obj, "reprocess": True} for obj in list_minio_objects("raw")]
+        print(f"Encontrados {len(raw_objects)} arquivos no bucket raw/")
+
+    if not raw_objects:
+        print("\nProcessamento concluído!")
+        return
+
+    # Objetos do /upload são nomeados pelo conteúdo; o nome enviado ainda
+    # identifica a estação dos arquivos sem bloco de metadados
+    try:
+        original_filenames = get_original_filenames()
+    except Exception as e:
+        print(f"Aviso: nomes originais indisponíveis (raw_file_index): {str(e)}")
+        original_filenames = {}
+
+    def process_file(obj: dict, cpu_pool=None):
+        filename = obj["key"]
+        original_filename = original_filenames.get(filename)
         try:
-            print(f"\nProcessando: {filename}")
-
-            df = read_from_minio("raw", filename)
-            print(f"  - Registros originais: {len(df)}")
-
-            df_clean = clean_weather_data(df)
-            print(f"  - Registros após limpeza: {len(df_clean)}")
-
-            df_clean["arquivo_origem"] = filename
+            raw_bytes = download_from_minio("raw", filename)
+            if cpu_pool is None:
+                df_clean = normalize_inmet_file(raw_bytes, filename, original_filename)
+            else:
+                df_clean = cpu_pool.submit(normalize_inmet_file, raw_bytes, filename, original_filename).result()
+            del raw_bytes
 
-            processed_filename = f"processed_{filename}"
-            write_to_minio(df_clean, "processed", processed_filename)
-
-            write_to_postgres(df_clean, "weather_hourly", if_exists="append")
-
-            all_processed.append(df_clean)
-            print("  ✓ Processado com sucesso")
+            save_processed(df_clean, obj)
+            print(f"  ✓ {filename}: {len(df_clean)} registros")
+            return True
 
         except Exception as e:
             print(f"  ✗ Erro ao processar {filename}: {str(e)}")
-
+            try:
+                record_file_manifest(filename, "raw", obj["etag"], obj["size"], 0, status="error")
+            except Exception:
+                pass
+            return False
+
+    if workers <= 1:
+        results = [process_file(obj) for obj in raw_objects]
+    else:
+        print(f"Usando {workers} processos para limpeza e {2 * workers} threads para I/O")
+        with ProcessPoolExecutor(max_workers=workers) as cpu_pool:
+            # Inicia os processos antes de criar as threads de I/O (fork seguro)
+            cpu_pool.submit(int).result()
+            with ThreadPoolExecutor(max_workers=2 * workers) as io_pool:
+                results = list(io_pool.map(lambda obj: process_file(obj, cpu_pool), raw_objects))
+
+    print(f"\n{sum(results)} arquivos processados, {len(results) - sum(results)} com erro")
     print("\nProcessamento concluído!")
 
 
@@ -177,4 +148,11 @@ def process_raw_files():
 # ============================================================
 
 if __name__ == "__main__":
-    process_raw_files()
+    parser = argparse.ArgumentParser(description="Processa os arquivos do bucket raw/")
+    parser.add_argument("--full", action="store_true",
+                        help="Reprocessa todos os arquivos, ignorando o manifesto")
+    parser.add_argument("--workers", type=int, default=PROCESSING_WORKERS,
+                        help=f"Processos usados na limpeza (padrão: {PROCESSING_WORKERS})")
+    args = parser.parse_args()
+
+    process_raw_files(incremental=not args.full, workers=args.workers)
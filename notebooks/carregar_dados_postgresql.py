@@ -9,86 +9,34 @@ import os
 sys.path.append('/home/jovyan/work')
 
 from utils import (
-    read_from_minio,
-    write_to_postgres,
-    list_minio_files
+    download_from_minio,
+    copy_to_postgres,
+    prepare_weather_hourly,
+    record_station_outages,
+    list_minio_files,
+    list_minio_objects,
+    list_pending_files,
+    get_original_filenames,
+    record_file_manifest,
+    daily_keys,
+    get_file_daily_keys,
+    refresh_weather_daily,
+    refresh_rollups,
+    WEATHER_HOURLY_KEY
 )
+from weather import normalize_inmet_file
 from datetime import datetime
 import pandas as pd
 import numpy as np
 
-def clean_weather_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Limpa e trata dados meteorológicos"""
-    df_clean = df.copy()
-    
-    # Normalizar nomes de colunas (exemplos comuns do INMET)
-    column_mapping = {
-        'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)': 'temperatura',
-        'TEMPERATURA MÁXIMA NA HORA ANT. (AUT) (°C)': 'temperatura_max',
-        'TEMPERATURA MÍNIMA NA HORA ANT. (AUT) (°C)': 'temperatura_min',
-        'UMIDADE RELATIVA DO AR, HORARIA (%)': 'umidade_relativa',
-        'PRESSÃO ATMOSFÉRICA AO NIVEL DA ESTAÇÃO, HORARIA (mB)': 'pressao_atmosferica',
-        'VENTO, DIREÇÃO HORARIA (gr)': 'direcao_vento',
-        'VENTO, VELOCIDADE HORARIA (m/s)': 'velocidade_vento',
-        'RADIAÇÃO GLOBAL (Kj/m²)': 'radiacao_solar',
-        'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'precipitacao',
-        'ESTACAO': 'estacao',
-        'UF': 'estado',
-        'NOME': 'cidade',
-        'Data': 'data_hora',
-        'Hora UTC': 'hora_utc'
-    }
-    
-    # Aplicar mapeamento
-    df_clean = df_clean.rename(columns=column_mapping)
-    
-    # Processar data/hora
-    if 'data_hora' in df_clean.columns:
-        # Se tiver coluna de hora separada, combinar
-        if 'hora_utc' in df_clean.columns:
-            df_clean['data_hora'] = pd.to_datetime(
-                df_clean['data_hora'].astype(str) + ' ' + df_clean['hora_utc'].astype(str).str.replace(' UTC', ''),
-                errors='coerce'
-            )
-        else:
-            df_clean['data_hora'] = pd.to_datetime(df_clean['data_hora'], errors='coerce')
-        
-        # Extrair componentes de data
-        df_clean['ano'] = df_clean['data_hora'].dt.year
-        df_clean['mes'] = df_clean['data_hora'].dt.month
-        df_clean['dia'] = df_clean['data_hora'].dt.day
-        df_clean['hora'] = df_clean['data_hora'].dt.hour
-    
-    # Limpar valores numéricos
-    numeric_cols = ['temperatura', 'umidade_relativa', 'pressao_atmosferica',
-                    'direcao_vento', 'velocidade_vento', 'radiacao_solar', 'precipitacao']
-    
-    for col in numeric_cols:
-        if col in df_clean.columns:
-            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
-            # Remover outliers extremos
-            if col == 'temperatura':
-                df_clean[col] = df_clean[col].clip(-50, 60)
-            elif col == 'umidade_relativa':
-                df_clean[col] = df_clean[col].clip(0, 100)
-            elif col == 'precipitacao':
-                df_clean[col] = df_clean[col].clip(0, 500)
-    
-    # Remover linhas sem data
-    df_clean = df_clean.dropna(subset=['data_hora'])
-    
-    # Selecionar colunas relevantes
-    relevant_cols = ['data_hora', 'estacao', 'cidade', 'estado',
-                     'temperatura', 'umidade_relativa', 'pressao_atmosferica',
-                     'direcao_vento', 'velocidade_vento', 'radiacao_solar',
-                     'precipitacao', 'ano', 'mes', 'dia', 'hora']
-    
-    available_cols = [col for col in relevant_cols if col in df_clean.columns]
-    df_clean = df_clean[available_cols]
-    
-    return df_clean
-
-def main():
+def main(incremental: bool = True):
+    """
+    Carrega os arquivos do bucket raw/ no PostgreSQL. No modo incremental
+    (padrão), arquivos já registrados em file_metadata com o mesmo ETag são
+    ignorados, então uma nova execução nunca duplica registros. Sem
+    incremental, todos os arquivos são recarregados, substituindo os
+    registros anteriores de cada um.
+    """
     print("=" * 60)
     print("CARREGANDO DADOS DO MINIO PARA POSTGRESQL")
     print("=" * 60)
@@ -107,6 +55,18 @@ def main():
         print("   Execute primeiro o upload dos dados via FastAPI.")
         return
     
+    # Selecionar apenas arquivos novos ou alterados (manifesto em file_metadata)
+    if incremental:
+        raw_objects = list_pending_files('raw')
+        print(f"{len(raw_objects)} arquivos novos ou alterados desde a ultima carga")
+        if len(raw_objects) == 0:
+            print("   Nada a fazer: todos os arquivos ja foram carregados.")
+            return
+    else:
+        # Carga completa: todos os arquivos substituem os registros já
+        # carregados, e o manifesto é gravado com o ETag e o tamanho atuais
+        raw_objects = [{**obj, 'reprocess': True} for obj in list_minio_objects('raw')]
+    
     # Verificar se já há dados no PostgreSQL
     try:
         from utils import read_from_postgres
@@ -115,61 +75,68 @@ def main():
         existing_count = result['total'].iloc[0]
         if existing_count > 0:
             print(f"Ja existem {existing_count:,} registros no PostgreSQL.")
-            print("   Continuando para adicionar mais dados...")
+            print("   Arquivos ja carregados (mesmo ETag) serao ignorados.")
     except:
         pass
     
-    all_processed = []
+    # Nomes enviados ao /upload (objetos nomeados pelo conteúdo)
+    try:
+        original_filenames = get_original_filenames()
+    except Exception:
+        original_filenames = {}
+    
     success_count = 0
     error_count = 0
     total_records = 0
+    total_days = 0
     
     # Processar arquivos
-    print(f"\nProcessando {len(raw_files)} arquivos...\n")
+    print(f"\nProcessando {len(raw_objects)} arquivos...\n")
     
-    for i, filename in enumerate(raw_files, 1):
+    for i, obj in enumerate(raw_objects, 1):
+        filename = obj['key']
         try:
-            print(f"[{i:3d}/{len(raw_files)}] {filename[:50]:50s}", end=" ... ")
-            
-            # Ler arquivo do MinIO
-            df = read_from_minio('raw', filename)
+            print(f"[{i:3d}/{len(raw_objects)}] {filename[:50]:50s}", end=" ... ")
             
-            # Limpar dados
-            df_clean = clean_weather_data(df)
+            # Ler e limpar com o mesmo esquema do processamento (weather/)
+            df_clean = normalize_inmet_file(download_from_minio('raw', filename), filename,
+                                            original_filenames.get(filename))
             
-            # Extrair cidade se necessário
-            if 'cidade' not in df_clean.columns or df_clean['cidade'].isna().all():
-                if 'arquivo_origem' in df_clean.columns:
-                    def extract_city(f):
-                        if pd.isna(f): return 'Desconhecida'
-                        f_str = str(f).lower()
-                        if 'dados_' in f_str:
-                            return f_str.split('dados_')[1].split('_')[0].capitalize()
-                        return 'Desconhecida'
-                    df_clean['cidade'] = df_clean['arquivo_origem'].apply(extract_city)
-            
-            # Adicionar metadados
-            df_clean['arquivo_origem'] = filename
-            # NOTA: Não adicionar 'processing_date' - a tabela usa 'ingestion_date' e 'created_at' (preenchidos automaticamente)
-            
-            # Filtrar apenas dados válidos
-            df_clean = df_clean.dropna(subset=['temperatura', 'umidade_relativa'])
-            
-            # Remover coluna 'processing_date' se existir (não existe na tabela PostgreSQL)
-            if 'processing_date' in df_clean.columns:
-                df_clean = df_clean.drop(columns=['processing_date'])
-            
-            if len(df_clean) > 0:
+            # Um arquivo recarregado sem nenhuma medição ainda precisa ter os
+            # registros antigos removidos
+            if len(df_clean) > 0 or obj.get('reprocess'):
+                # Estação registrada em stations (df_clean passa a usar o nome canônico)
+                hourly = prepare_weather_hourly(df_clean)
+                
+                # Dias afetados (inclusive os que um arquivo recarregado deixou de cobrir)
+                days = daily_keys(df_clean)
+                if obj.get('reprocess'):
+                    days |= get_file_daily_keys(filename)
+                
                 # Salvar no PostgreSQL
-                write_to_postgres(df_clean, 'weather_hourly', if_exists='append')
+                copy_to_postgres(
+                    hourly, 'weather_hourly',
+                    key_columns=WEATHER_HOURLY_KEY,
+                    replace_file=filename if obj.get('reprocess') else None
+                )
+                
+                # Horas sem medição (descartadas na leitura) como intervalos
+                record_station_outages(df_clean, filename)
+                
+                # Agregações incrementais: só os dias/meses/semanas deste arquivo
+                total_days += refresh_weather_daily(days)
+                refresh_rollups(days)
                 
-                all_processed.append(df_clean)
                 success_count += 1
                 total_records += len(df_clean)
                 print(f"OK {len(df_clean):,} registros")
             else:
+                record_station_outages(df_clean, filename)
                 print(f"Sem dados validos")
             
+            if obj['etag'] is not None:
+                record_file_manifest(filename, 'raw', obj['etag'], obj['size'], len(df_clean))
+            
         except Exception as e:
             error_count += 1
             print(f"Erro: {str(e)[:60]}")
@@ -182,35 +149,9 @@ def main():
     print(f"   Sucesso: {success_count} arquivos")
     print(f"   Erros: {error_count} arquivos")
     print(f"   Total de registros: {total_records:,}")
+    print(f"   Dias atualizados em weather_daily: {total_days:,}")
     
-    if all_processed:
-        df_final = pd.concat(all_processed, ignore_index=True)
-        
-        # Criar agregação diária
-        print("\nCriando agregacao diaria...")
-        try:
-            df_final['data'] = pd.to_datetime(df_final['data_hora']).dt.date
-            
-            daily_agg = df_final.groupby(['data', 'estacao', 'cidade']).agg({
-                'temperatura': ['mean', 'max', 'min'],
-                'umidade_relativa': 'mean',
-                'pressao_atmosferica': 'mean',
-                'velocidade_vento': 'mean',
-                'radiacao_solar': 'sum',
-                'precipitacao': 'sum'
-            }).reset_index()
-            
-            daily_agg.columns = ['data', 'estacao', 'cidade',
-                               'temperatura_media', 'temperatura_max', 'temperatura_min',
-                               'umidade_media', 'pressao_media',
-                               'velocidade_vento_media', 'radiacao_solar_total',
-                               'precipitacao_total']
-            
-            write_to_postgres(daily_agg, 'weather_daily', if_exists='replace')
-            print(f"   Agregacao diaria criada: {len(daily_agg):,} registros")
-        except Exception as e:
-            print(f"   Erro ao criar agregacao diaria: {str(e)}")
-        
+    if success_count > 0:
         # Verificar resultado final
         try:
             from utils import read_from_postgres
@@ -229,5 +170,6 @@ def main():
         print("   Verifique os erros acima e tente novamente.")
 
 if __name__ == "__main__":
-    main()
+    # --full recarrega todos os arquivos, ignorando o manifesto
+    main(incremental="--full" not in sys.argv)
 
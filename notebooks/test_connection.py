@@ -4,17 +4,18 @@ Script para testar conexão com PostgreSQL
 Execute no JupyterLab ou localmente
 """
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 import pandas as pd
 
-# Configuração PostgreSQL
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres")
-POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "weather_db")
-
-# URL de conexão
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+# Mesma configuração (e pool) usada por utils.py e pela API
+from weather.resources import (
+    POSTGRES_HOST,
+    POSTGRES_USER,
+    POSTGRES_DB,
+    POSTGRES_POOL_SIZE,
+    POSTGRES_MAX_OVERFLOW,
+    get_engine,
+)
 
 print("=== Teste de Conexão PostgreSQL ===\n")
 print(f"Host: {POSTGRES_HOST}")
@@ -24,8 +25,8 @@ print(f"URL: postgresql://{POSTGRES_USER}:***@{POSTGRES_HOST}:5432/{POSTGRES_DB}
 
 try:
     # Criar engine
-    engine = create_engine(DATABASE_URL)
-    print("✓ Engine SQLAlchemy criado")
+    engine = get_engine()
+    print(f"✓ Engine SQLAlchemy criado (pool: {POSTGRES_POOL_SIZE} + {POSTGRES_MAX_OVERFLOW} extras)")
     
     # Testar conexão
     with engine.connect() as conn:
@@ -56,7 +57,7 @@ try:
             if count > 0:
                 result = conn.execute(text("""
                     SELECT cidade, COUNT(*) as registros 
-                    FROM weather_hourly 
+                    FROM weather_hourly_stations 
                     GROUP BY cidade 
                     ORDER BY registros DESC 
                     LIMIT 5;
@@ -1,88 +1,236 @@
 """
 Utilitários para trabalhar com MinIO, PostgreSQL e MLFlow
+
+As dependências pesadas (pandas, SQLAlchemy, boto3, pyarrow, MLflow) e as
+conexões só são carregadas no primeiro uso, então importar este módulo é
+rápido e não depende de nenhum serviço estar no ar. `utils.engine` e
+`utils.s3_client` continuam disponíveis (ver __getattr__ no fim do arquivo).
+Tempo de importação: scripts/check_import_time.py (regressão: tests/test_import_time.py)
 """
+from __future__ import annotations
+
+import hashlib
+import json
 import os
-import boto3
-from botocore.client import Config
-import pandas as pd
-from sqlalchemy import create_engine
-import mlflow
-from io import BytesIO, StringIO
-
-# Configuração MinIO
-MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
-MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
-MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
-
-# Cliente S3 (MinIO)
-s3_client = boto3.client(
-    's3',
-    endpoint_url=f'http://{MINIO_ENDPOINT}',
-    aws_access_key_id=MINIO_ACCESS_KEY,
-    aws_secret_access_key=MINIO_SECRET_KEY,
-    config=Config(signature_version='s3v4'),
-    region_name='us-east-1'
+from datetime import timedelta
+from io import BytesIO
+
+from weather.schema import SCHEMA_VERSION
+from weather.compression import compress_bytes, content_encoding_args, read_body
+from weather.resources import (
+    MINIO_ENDPOINT,
+    MINIO_ACCESS_KEY,
+    MINIO_SECRET_KEY,
+    DATABASE_URL,
+    get_engine,
+    get_s3_client,
 )
 
-# Configuração PostgreSQL
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres")
-POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "weather_db")
+# Configuração MLFlow (aplicada em setup_mlflow_experiment)
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
 
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+# Cache local dos objetos lidos do MinIO (MINIO_CACHE_MAX_MB=0 desativa)
+MINIO_CACHE_DIR = os.getenv(
+    "MINIO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "projeto_avd", "minio")
+)
+MINIO_CACHE_MAX_BYTES = int(os.getenv("MINIO_CACHE_MAX_MB", "2048")) * 1024 * 1024
 
-# Engine SQLAlchemy
-engine = create_engine(DATABASE_URL)
 
-# Configuração MLFlow
-MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
-mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+def text(sql: str):
+    """sqlalchemy.text, importado no primeiro uso"""
+    from sqlalchemy import text as sql_text
 
+    return sql_text(sql)
 
-def read_from_minio(bucket: str, filename: str) -> pd.DataFrame:
+
+def download_from_minio(bucket: str, filename: str) -> bytes:
     """
-    Lê arquivos do INMET armazenados no MinIO, detecta automaticamente 
-    a linha do cabeçalho e retorna um DataFrame limpo.
+    Baixa o conteúdo bruto de um objeto do MinIO, descomprimindo objetos
+    gravados com Content-Encoding gzip/zstd (ver weather.compression)
+    
+    Args:
+        bucket: Nome do bucket
+        filename: Nome do arquivo
     """
-    try:
-        # Baixar bytes do MinIO
-        response = s3_client.get_object(Bucket=bucket, Key=filename)
-        raw_bytes = response["Body"].read()
-
-        # Decodificar o arquivo como texto
-        raw_text = raw_bytes.decode("latin1").splitlines()
-
-        # Detectar automaticamente o cabeçalho real
-        header_index = None
-        for i, line in enumerate(raw_text):
-            # Cabeçalho padrão dos arquivos INMET
-            if line.strip().startswith("Data;") or line.strip().startswith("DATA;"):
-                header_index = i
-                break
+    response = get_s3_client().get_object(Bucket=bucket, Key=filename)
+    return read_body(response["Body"], response.get("ContentEncoding"))
 
-        if header_index is None:
-            raise ValueError("Não foi possível identificar o cabeçalho (linha 'Data;Hora') no CSV.")
 
-        # Reconstruir apenas a parte útil do arquivo
-        csv_clean = "\n".join(raw_text[header_index:])
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()[:16]
 
-        # Ler com pandas com separador correto e engine robusta
-        df = pd.read_csv(
-            StringIO(csv_clean),
-            sep=";",
-            engine="python",
-            encoding="latin1",
-        )
 
+def _cache_evict(keep: str = None):
+    """
+    Remove as entradas menos usadas recentemente (mtime, atualizado a cada
+    acerto) até o cache caber em MINIO_CACHE_MAX_BYTES
+    """
+    entries = []
+    for entry in os.scandir(MINIO_CACHE_DIR):
+        if entry.name.endswith('.arrow'):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= MINIO_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_frame(namespace: str, version: str, loader, variant: str = '') -> pd.DataFrame:
+    """
+    Cache em disco de DataFrames lidos do MinIO (read-through)
+
+    Cada entrada é um arquivo Arrow IPC (Feather v2, sem compressão) lido com
+    memory map, nomeado por namespace, versão (ETag) e variante (ex.: colunas
+    pedidas). Quando a versão muda, as entradas antigas do mesmo namespace
+    são apagadas; o tamanho total é limitado por MINIO_CACHE_MAX_BYTES com
+    descarte LRU. Os metadados de `df.attrs` são preservados.
+
+    Args:
+        namespace: Identificação do objeto (ex.: 'raw/dados_recife_2023.CSV')
+        version: Versão do objeto no MinIO (ETag); outra versão invalida o cache
+        loader: Função sem argumentos que baixa e monta o DataFrame
+        variant: Distingue leituras diferentes do mesmo objeto
+
+    Returns:
+        DataFrame do cache ou de loader()
+    """
+    if MINIO_CACHE_MAX_BYTES <= 0:
+        return loader()
+
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    prefix = _digest(namespace)
+    path = os.path.join(MINIO_CACHE_DIR, f"{prefix}-{_digest(version)}-{_digest(variant)}.arrow")
+    try:
+        table = feather.read_table(path, memory_map=True)
+        os.utime(path)
+    except (FileNotFoundError, pa.ArrowInvalid):
+        table = None
+
+    if table is not None:
+        df = table.to_pandas()
+        attrs = (table.schema.metadata or {}).get(b'utils.attrs')
+        if attrs:
+            df.attrs = json.loads(attrs)
         return df
 
+    df = loader()
+    os.makedirs(MINIO_CACHE_DIR, exist_ok=True)
+
+    # Versões antigas do mesmo objeto não serão mais lidas
+    current_version = f"{prefix}-{_digest(version)}-"
+    for entry in os.scandir(MINIO_CACHE_DIR):
+        if entry.name.startswith(f"{prefix}-") and not entry.name.startswith(current_version):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    try:
+        table = pa.Table.from_pandas(df)
+        if df.attrs:
+            metadata = dict(table.schema.metadata or {})
+            metadata[b'utils.attrs'] = json.dumps(df.attrs, default=str).encode('utf-8')
+            table = table.replace_schema_metadata(metadata)
+        if table.nbytes > MINIO_CACHE_MAX_BYTES:
+            return df
+
+        # Grava em arquivo temporário e renomeia: leitores concorrentes nunca
+        # veem uma entrada pela metade
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+        _cache_evict(keep=path)
+    except Exception as e:
+        print(f"Aviso: não foi possível gravar {namespace} no cache local: {str(e)}")
+    return df
+
+
+def minio_etag(bucket: str, filename: str) -> str:
+    """
+    ETag atual de um objeto do MinIO (requisição HEAD, sem baixar o conteúdo)
+    
+    Args:
+        bucket: Nome do bucket
+        filename: Nome do arquivo
+    """
+    response = get_s3_client().head_object(Bucket=bucket, Key=filename)
+    return response['ETag'].strip('"')
+
+
+def clear_minio_cache():
+    """
+    Apaga todas as entradas do cache local (MINIO_CACHE_DIR)
+    """
+    if not os.path.isdir(MINIO_CACHE_DIR):
+        return
+    for entry in os.scandir(MINIO_CACHE_DIR):
+        if entry.name.endswith(('.arrow', '.tmp')):
+            os.remove(entry.path)
+
+
+def minio_cache_info() -> dict:
+    """
+    Resumo do cache local
+
+    Returns:
+        Dicionário com 'path', 'entries', 'size_mb' e 'max_mb'
+    """
+    sizes = []
+    if os.path.isdir(MINIO_CACHE_DIR):
+        sizes = [entry.stat().st_size for entry in os.scandir(MINIO_CACHE_DIR)
+                 if entry.name.endswith('.arrow')]
+    return {
+        'path': MINIO_CACHE_DIR,
+        'entries': len(sizes),
+        'size_mb': round(sum(sizes) / 1024 / 1024, 1),
+        'max_mb': MINIO_CACHE_MAX_BYTES // 1024 // 1024,
+    }
+
+
+def read_from_minio(bucket: str, filename: str, use_cache: bool = True,
+                    drop_empty: bool = True) -> pd.DataFrame:
+    """
+    Lê arquivos do INMET armazenados no MinIO, detecta automaticamente 
+    a linha do cabeçalho e retorna um DataFrame limpo
+    (ver parse_inmet_csv).
+
+    Com use_cache, o resultado fica no cache local (ver cached_frame) e
+    leituras repetidas só fazem um HEAD para conferir o ETag. A versão da
+    entrada inclui SCHEMA_VERSION, então mudanças no parser invalidam o
+    cache; as opções de leitura entram na variante.
+    """
+    from weather import parse_inmet_csv
+
+    try:
+        def load():
+            return parse_inmet_csv(download_from_minio(bucket, filename), drop_empty=drop_empty)
+
+        if not use_cache:
+            return load()
+        version = f"{minio_etag(bucket, filename)}:schema{SCHEMA_VERSION}"
+        return cached_frame(f"{bucket}/{filename}", version, load,
+                            variant=f"drop_empty={drop_empty}")
+
     except Exception as e:
         print(f"Erro ao ler arquivo do MinIO ({filename}): {str(e)}")
         raise
 
 
-def write_to_minio(df: pd.DataFrame, bucket: str, filename: str):
+def write_to_minio(df: pd.DataFrame, bucket: str, filename: str, compression: str = None):
     """
     Escreve um DataFrame como CSV no MinIO
     
@@ -90,17 +238,19 @@ def write_to_minio(df: pd.DataFrame, bucket: str, filename: str):
         df: DataFrame a ser salvo
         bucket: Nome do bucket
         filename: Nome do arquivo
+        compression: 'gzip', 'zstd' ou 'none' (padrão: RAW_COMPRESSION);
+            registrada no Content-Encoding e desfeita em download_from_minio
     """
     try:
         csv_buffer = BytesIO()
         df.to_csv(csv_buffer, index=False, sep=';', encoding='latin1')
-        csv_buffer.seek(0)
+        csv_buffer = BytesIO(compress_bytes(csv_buffer.getvalue(), compression))
         
-        s3_client.upload_fileobj(
+        get_s3_client().upload_fileobj(
             csv_buffer,
             bucket,
             filename,
-            ExtraArgs={'ContentType': 'text/csv'}
+            ExtraArgs={'ContentType': 'text/csv', **content_encoding_args(compression)}
         )
         print(f"Arquivo salvo no MinIO: {bucket}/{filename}")
     except Exception as e:
@@ -108,42 +258,453 @@ def write_to_minio(df: pd.DataFrame, bucket: str, filename: str):
         raise
 
 
-def list_minio_files(bucket: str) -> list:
+def _arrow_filesystem():
+    """
+    Sistema de arquivos S3 do pyarrow apontando para o MinIO, usado para
+    leituras de Parquet com seleção de colunas e filtros de partição
+    """
+    from pyarrow import fs
+
+    return fs.S3FileSystem(
+        access_key=MINIO_ACCESS_KEY,
+        secret_key=MINIO_SECRET_KEY,
+        endpoint_override=MINIO_ENDPOINT,
+        scheme='http',
+        region='us-east-1'
+    )
+
+
+def write_parquet_to_minio(df: pd.DataFrame, bucket: str, filename: str, compression: str = 'zstd'):
+    """
+    Escreve um DataFrame como Parquet no MinIO
+    
+    Args:
+        df: DataFrame a ser salvo
+        bucket: Nome do bucket
+        filename: Nome do arquivo
+        compression: Codec de compressão do Parquet ('zstd', 'snappy', 'gzip' ou None)
+    """
+    try:
+        parquet_buffer = BytesIO()
+        df.to_parquet(parquet_buffer, index=False, compression=compression)
+        parquet_buffer.seek(0)
+        
+        get_s3_client().upload_fileobj(
+            parquet_buffer,
+            bucket,
+            filename,
+            ExtraArgs={'ContentType': 'application/vnd.apache.parquet'}
+        )
+        print(f"Arquivo salvo no MinIO: {bucket}/{filename}")
+    except Exception as e:
+        print(f"Erro ao salvar arquivo no MinIO: {str(e)}")
+        raise
+
+
+def write_parquet_partitions(df: pd.DataFrame, bucket: str = 'processed',
+                             partition_cols: tuple = ('estacao', 'ano')) -> list:
+    """
+    Escreve um DataFrame no MinIO particionado no layout Hive
+    (ex.: estacao=recife/ano=2023/part.parquet). As colunas de partição
+    ficam apenas no caminho, como no padrão Hive.
+    
+    Args:
+        df: DataFrame a ser salvo
+        bucket: Nome do bucket
+        partition_cols: Colunas usadas para particionar
+        
+    Returns:
+        Lista de chaves escritas
+    """
+    partition_cols = list(partition_cols)
+    keys = []
+    for values, part in df.groupby(partition_cols, observed=True, sort=False):
+        if not isinstance(values, tuple):
+            values = (values,)
+        prefix = "/".join(f"{col}={value}" for col, value in zip(partition_cols, values))
+        key = f"{prefix}/part.parquet"
+        write_parquet_to_minio(part.drop(columns=partition_cols), bucket, key)
+        keys.append(key)
+    return keys
+
+
+def read_parquet_from_minio(bucket: str, filename: str, columns: list = None,
+                            use_cache: bool = True) -> pd.DataFrame:
+    """
+    Lê um arquivo Parquet do MinIO
+    
+    Args:
+        bucket: Nome do bucket
+        filename: Nome do arquivo
+        columns: Colunas a carregar (None = todas)
+        use_cache: Usa o cache local validado pelo ETag (ver cached_frame)
+        
+    Returns:
+        DataFrame com os dados
+    """
+    import pyarrow.parquet as pq
+
+    try:
+        def load():
+            table = pq.read_table(f"{bucket}/{filename}", filesystem=_arrow_filesystem(), columns=columns)
+            return table.to_pandas()
+
+        if not use_cache:
+            return load()
+        return cached_frame(f"{bucket}/{filename}", minio_etag(bucket, filename), load,
+                            variant=repr(columns))
+    except Exception as e:
+        print(f"Erro ao ler arquivo do MinIO ({filename}): {str(e)}")
+        raise
+
+
+def read_processed_dataset(estacao=None, ano=None, columns: list = None,
+                           bucket: str = 'processed', use_cache: bool = True) -> pd.DataFrame:
+    """
+    Lê o dataset Parquet particionado (estacao=<x>/ano=<y>/part.parquet) do
+    bucket processed, carregando apenas as partições e colunas pedidas
+    
+    Args:
+        estacao: Estação ou lista de estações (None = todas)
+        ano: Ano ou lista de anos (None = todos)
+        columns: Colunas a carregar, incluindo 'estacao'/'ano' se desejado (None = todas)
+        bucket: Nome do bucket
+        use_cache: Usa o cache local; a versão é calculada a partir dos ETags
+            de todas as partições, então qualquer partição regravada invalida
+            a entrada (ver cached_frame)
+        
+    Returns:
+        DataFrame com os dados
+    """
+    if use_cache:
+        partitions = sorted(
+            f"{obj['key']}:{obj['etag']}" for obj in iter_minio_objects(bucket)
+            if obj['key'].endswith('.parquet') and not obj['key'].startswith(('.', '_', 'processed_'))
+        )
+        return cached_frame(
+            f"{bucket}/dataset", '\n'.join(partitions),
+            lambda: read_processed_dataset(estacao, ano, columns, bucket, use_cache=False),
+            variant=repr((estacao, ano, columns))
+        )
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(
+        bucket,
+        filesystem=_arrow_filesystem(),
+        format='parquet',
+        partitioning='hive',
+        # Ignora os CSVs legados (processed_*.CSV) gravados na raiz do bucket
+        ignore_prefixes=['.', '_', 'processed_']
+    )
+
+    filtro = None
+    for field, value in (('estacao', estacao), ('ano', ano)):
+        if value is None:
+            continue
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        condicao = ds.field(field).isin(list(values))
+        filtro = condicao if filtro is None else filtro & condicao
+
+    return dataset.to_table(columns=columns, filter=filtro).to_pandas()
+
+
+def iter_minio_objects(bucket: str, prefix: str = '', page_size: int = 1000):
+    """
+    Percorre os objetos de um bucket do MinIO página a página
+    (list_objects_v2 paginado), sem limite de 1.000 chaves
+    
+    Args:
+        bucket: Nome do bucket
+        prefix: Prefixo das chaves (opcional)
+        page_size: Chaves por requisição (máximo 1.000)
+        
+    Yields:
+        Dicionários com 'key', 'etag' e 'size'
+    """
+    paginator = get_s3_client().get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=bucket,
+        Prefix=prefix,
+        PaginationConfig={'PageSize': page_size}
+    )
+    for page in pages:
+        for obj in page.get('Contents', []):
+            yield {'key': obj['Key'], 'etag': obj['ETag'].strip('"'), 'size': obj['Size']}
+
+
+def delete_from_minio(bucket: str, keys: list):
+    """
+    Remove objetos de um bucket do MinIO (até 1.000 por requisição);
+    chaves inexistentes são ignoradas
+
+    Args:
+        bucket: Nome do bucket
+        keys: Nomes dos objetos
+    """
+    keys = list(keys)
+    try:
+        for start in range(0, len(keys), 1000):
+            get_s3_client().delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+            )
+    except Exception as e:
+        print(f"Erro ao remover arquivos do MinIO: {str(e)}")
+        raise
+
+
+def list_minio_files(bucket: str, prefix: str = '') -> list:
     """
     Lista arquivos em um bucket do MinIO
     
     Args:
         bucket: Nome do bucket
+        prefix: Prefixo das chaves (opcional)
         
     Returns:
         Lista de nomes de arquivos
     """
+    return [obj['key'] for obj in list_minio_objects(bucket, prefix)]
+
+
+def list_minio_objects(bucket: str, prefix: str = '') -> list:
+    """
+    Lista objetos de um bucket do MinIO com ETag e tamanho
+    
+    Args:
+        bucket: Nome do bucket
+        prefix: Prefixo das chaves (opcional)
+        
+    Returns:
+        Lista de dicionários com 'key', 'etag' e 'size'
+    """
     try:
-        response = s3_client.list_objects_v2(Bucket=bucket)
-        if 'Contents' in response:
-            return [obj['Key'] for obj in response['Contents']]
-        return []
+        return list(iter_minio_objects(bucket, prefix))
     except Exception as e:
         print(f"Erro ao listar arquivos: {str(e)}")
         return []
 
 
-def read_from_postgres(table_name: str, query: str = None) -> pd.DataFrame:
+def get_file_manifest(bucket: str) -> dict:
+    """
+    Lê o manifesto de arquivos processados (tabela file_metadata)
+    
+    Args:
+        bucket: Nome do bucket
+        
+    Returns:
+        Dicionário filename -> {'etag', 'file_size', 'records_count', 'status',
+        'schema_version'}
+    """
+    query = text("""
+        SELECT filename, etag, file_size, records_count, status, schema_version
+        FROM file_metadata
+        WHERE bucket = :bucket
+    """)
+    with get_engine().connect() as conn:
+        rows = conn.execute(query, {'bucket': bucket}).mappings().all()
+    return {row['filename']: dict(row) for row in rows}
+
+
+def get_original_filenames() -> dict:
+    """
+    Nomes originais dos arquivos enviados pelo /upload, cujos objetos no
+    bucket raw são nomeados pelo conteúdo (sha256/<xx>/<hash>.csv), a partir
+    de raw_file_index. Um conteúdo enviado com vários nomes fica com o
+    primeiro.
+
+    Returns:
+        Dicionário object_key -> original_filename
+    """
+    query = text("""
+        SELECT DISTINCT ON (object_key) object_key, original_filename
+        FROM raw_file_index
+        ORDER BY object_key, first_uploaded_at, original_filename
+    """)
+    with get_engine().connect() as conn:
+        return {row.object_key: row.original_filename for row in conn.execute(query)}
+
+
+def list_pending_files(bucket: str) -> list:
+    """
+    Lista os objetos do bucket que ainda não foram processados, que
+    mudaram (ETag diferente) desde o último processamento ou que foram
+    processados com uma versão antiga do esquema (weather.SCHEMA_VERSION)
+    
+    Args:
+        bucket: Nome do bucket
+        
+    Returns:
+        Lista de dicionários com 'key', 'etag', 'size' e 'reprocess'
+        (True se o arquivo já havia sido carregado antes)
+    """
+    manifest = get_file_manifest(bucket)
+    pending = []
+    for obj in iter_minio_objects(bucket):
+        entry = manifest.get(obj['key'])
+        if (entry and entry['status'] == 'processed' and entry['etag'] == obj['etag']
+                and entry['schema_version'] == SCHEMA_VERSION):
+            continue
+        pending.append({**obj, 'reprocess': entry is not None})
+    return pending
+
+
+def record_file_manifest(filename: str, bucket: str, etag: str, file_size: int,
+                         records_count: int, status: str = 'processed',
+                         schema_version: int = SCHEMA_VERSION):
+    """
+    Registra (ou atualiza) um arquivo no manifesto file_metadata
+    
+    Args:
+        filename: Nome do objeto no bucket
+        bucket: Nome do bucket
+        etag: ETag do objeto no momento do processamento
+        file_size: Tamanho do objeto em bytes
+        records_count: Registros carregados a partir do arquivo
+        status: 'processed' ou 'error'
+        schema_version: Versão do esquema de limpeza usada no arquivo
+    """
+    query = text("""
+        INSERT INTO file_metadata (filename, bucket, etag, file_size, records_count, status,
+                                   schema_version, processed_at)
+        VALUES (:filename, :bucket, :etag, :file_size, :records_count, :status,
+                :schema_version, NOW())
+        ON CONFLICT (filename) DO UPDATE SET
+            bucket = EXCLUDED.bucket,
+            etag = EXCLUDED.etag,
+            file_size = EXCLUDED.file_size,
+            records_count = EXCLUDED.records_count,
+            status = EXCLUDED.status,
+            schema_version = EXCLUDED.schema_version,
+            processed_at = EXCLUDED.processed_at
+    """)
+    with get_engine().begin() as conn:
+        conn.execute(query, {
+            'filename': filename,
+            'bucket': bucket,
+            'etag': etag,
+            'file_size': file_size,
+            'records_count': records_count,
+            'status': status,
+            'schema_version': schema_version,
+        })
+
+
+def build_select(table_name: str, columns: list = None, where: dict = None,
+                 not_null: list = None) -> tuple:
+    """
+    Monta um SELECT com projeção de colunas e filtros executados no próprio
+    PostgreSQL, para trazer só o necessário
+
+    Args:
+        table_name: Nome da tabela
+        columns: Colunas retornadas (None = todas)
+        where: Filtros por coluna: valor único (=), lista (IN) ou tupla
+            (mínimo, máximo) com None para intervalo aberto
+        not_null: Colunas que não podem ser nulas
+
+    Returns:
+        Tupla (query, params) para pd.read_sql / conn.execute
+
+    Exemplo:
+        build_select('weather_hourly', ['data_hora', 'temperatura'],
+                     where={'estacao': ['recife'], 'ano': (2021, 2023)})
+    """
+    select = ", ".join(columns) if columns else "*"
+    conditions, params = [], {}
+    for i, (col, value) in enumerate((where or {}).items()):
+        if isinstance(value, tuple):
+            low, high = value
+            if low is not None:
+                conditions.append(f"{col} >= :p{i}_min")
+                params[f"p{i}_min"] = low
+            if high is not None:
+                conditions.append(f"{col} <= :p{i}_max")
+                params[f"p{i}_max"] = high
+        elif isinstance(value, (list, set)):
+            conditions.append(f"{col} = ANY(:p{i})")
+            params[f"p{i}"] = list(value)
+        else:
+            conditions.append(f"{col} = :p{i}")
+            params[f"p{i}"] = value
+    conditions += [f"{col} IS NOT NULL" for col in (not_null or [])]
+
+    query = f"SELECT {select} FROM {table_name}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, params
+
+
+def iter_postgres_chunks(table_name: str = None, query: str = None, params: dict = None,
+                         chunksize: int = 50000, columns: list = None,
+                         where: dict = None, not_null: list = None):
+    """
+    Lê uma consulta em blocos com um cursor do lado do servidor (named cursor
+    do psycopg2): só `chunksize` linhas ficam em memória por vez, então a
+    tabela inteira pode ser processada com memória limitada.
+
+    Args:
+        table_name: Nome da tabela (usado com columns/where/not_null, ver build_select)
+        query: Query SQL customizada (substitui table_name)
+        params: Parâmetros da query customizada
+        chunksize: Linhas por bloco
+
+    Yields:
+        DataFrames com até `chunksize` linhas
+    """
+    import pandas as pd
+
+    if query is None:
+        query, params = build_select(table_name, columns, where, not_null)
+    try:
+        with get_engine().connect().execution_options(stream_results=True, max_row_buffer=chunksize) as conn:
+            for chunk in pd.read_sql(text(query), conn, params=params, chunksize=chunksize):
+                yield chunk
+    except Exception as e:
+        print(f"Erro ao ler do PostgreSQL: {str(e)}")
+        raise
+
+
+def iter_postgres_arrow(table_name: str = None, query: str = None, params: dict = None,
+                        batch_size: int = 50000, **select):
+    """
+    Igual a iter_postgres_chunks, mas entrega pyarrow.RecordBatch (para
+    gravar Parquet ou alimentar bibliotecas baseadas em Arrow sem pandas)
+    """
+    import pyarrow as pa
+
+    for chunk in iter_postgres_chunks(table_name, query, params, batch_size, **select):
+        yield pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+
+
+def read_from_postgres(table_name: str, query: str = None, chunksize: int = None,
+                       columns: list = None, where: dict = None, not_null: list = None):
     """
     Lê dados do PostgreSQL
     
     Args:
         table_name: Nome da tabela
         query: Query SQL customizada (opcional)
+        chunksize: Se informado, retorna um iterador de DataFrames lidos com
+            cursor do lado do servidor (ver iter_postgres_chunks)
+        columns, where, not_null: Projeção e filtros aplicados no banco
+            quando não há query customizada (ver build_select)
         
     Returns:
-        DataFrame com os dados
+        DataFrame com os dados (ou iterador de DataFrames com chunksize)
     """
+    import pandas as pd
+
+    if chunksize:
+        return iter_postgres_chunks(table_name, query, chunksize=chunksize,
+                                    columns=columns, where=where, not_null=not_null)
     try:
         if query:
-            df = pd.read_sql(query, engine)
+            df = pd.read_sql(query, get_engine())
         else:
-            df = pd.read_sql(f"SELECT * FROM {table_name}", engine)
+            query, params = build_select(table_name, columns, where, not_null)
+            df = pd.read_sql(text(query), get_engine(), params=params)
         return df
     except Exception as e:
         print(f"Erro ao ler do PostgreSQL: {str(e)}")
@@ -160,24 +721,626 @@ def write_to_postgres(df: pd.DataFrame, table_name: str, if_exists: str = 'appen
         if_exists: Comportamento se tabela existe ('fail', 'replace', 'append')
     """
     try:
-        df.to_sql(table_name, engine, if_exists=if_exists, index=False)
+        df.to_sql(table_name, get_engine(), if_exists=if_exists, index=False)
         print(f"Dados salvos na tabela {table_name}: {len(df)} registros")
     except Exception as e:
         print(f"Erro ao salvar no PostgreSQL: {str(e)}")
         raise
 
 
+def _upsert_station(record: dict) -> tuple:
+    """
+    Implementa upsert_station, retornando também o nome canônico (estacao)
+    da linha gravada em stations
+    """
+    from sqlalchemy.exc import IntegrityError
+
+    columns = ['estacao', 'codigo_wmo', 'nome', 'uf', 'regiao',
+               'latitude', 'longitude', 'altitude', 'data_fundacao']
+    params = {col: record.get(col) for col in columns}
+    # Metadados ausentes não apagam os já conhecidos
+    updates = ",\n            ".join(
+        f"{col} = COALESCE(EXCLUDED.{col}, stations.{col})" for col in columns[1:]
+    )
+    # O código WMO identifica a estação mesmo que o nome do cabeçalho mude
+    # (acentos, grafia): a linha existente é atualizada e mantém seu nome
+    by_wmo = text(f"""
+        UPDATE stations SET
+            {", ".join(f"{col} = COALESCE(:{col}, {col})" for col in columns[2:])},
+            updated_at = NOW()
+        WHERE codigo_wmo = :codigo_wmo
+        RETURNING station_id, estacao
+    """)
+    by_name = text(f"""
+        INSERT INTO stations ({", ".join(columns)})
+        VALUES ({", ".join(f":{col}" for col in columns)})
+        ON CONFLICT (estacao) DO UPDATE SET
+            {updates},
+            updated_at = NOW()
+        RETURNING station_id, estacao
+    """)
+    for attempt in range(2):
+        try:
+            with get_engine().begin() as conn:
+                row = None
+                if params['codigo_wmo']:
+                    row = conn.execute(by_wmo, params).first()
+                if row is None:
+                    row = conn.execute(by_name, params).one()
+                return row.station_id, row.estacao
+        except IntegrityError:
+            # Outra carga inseriu o mesmo código WMO com outro nome; na
+            # segunda tentativa a estação é encontrada pelo código
+            if attempt:
+                raise
+
+
+def upsert_station(record: dict) -> int:
+    """
+    Insere ou atualiza uma estação na dimensão stations e retorna sua chave.
+    A estação é procurada primeiro pelo codigo_wmo e depois pelo nome
+    (estacao).
+
+    Args:
+        record: Dicionário com 'estacao' e, se conhecidos, os metadados do
+            cabeçalho (codigo_wmo, nome, uf, regiao, latitude, longitude,
+            altitude, data_fundacao), ver weather.station_record
+
+    Returns:
+        station_id (SMALLINT) da estação
+    """
+    return _upsert_station(record)[0]
+
+
+def ensure_weather_hourly_partitions(years):
+    """
+    Garante que weather_hourly tem as partições anuais dos anos informados
+    (função create_weather_hourly_partition, sql_scripts/01_create_tables.sql)
+
+    Args:
+        years: Anos (inteiros) que serão inseridos
+    """
+    query = text("SELECT create_weather_hourly_partition(:ano)")
+    with get_engine().begin() as conn:
+        for ano in sorted({int(year) for year in years}):
+            conn.execute(query, {'ano': ano})
+
+
+# Medições obrigatórias em weather_hourly: registros sem alguma delas ficam
+# só em processed/
+WEATHER_HOURLY_REQUIRED = ['temperatura', 'umidade_relativa']
+
+
+def prepare_weather_hourly(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte um DataFrame limpo (normalize_inmet_file) nas colunas de
+    weather_hourly: as estações são registradas em stations a partir dos
+    metadados do cabeçalho (df.attrs) e substituídas pela chave station_id;
+    estacao, cidade e estado ficam só na dimensão. As partições anuais
+    necessárias são criadas. Registros sem alguma das medições de
+    WEATHER_HOURLY_REQUIRED são descartados.
+
+    Uma estação já registrada com o mesmo codigo_wmo mantém seu nome: a
+    coluna estacao de `df` é reescrita no próprio DataFrame com o nome
+    canônico, para que as etapas seguintes (daily_keys, partições do
+    MinIO) usem a mesma estação.
+
+    Args:
+        df: DataFrame limpo, com a coluna estacao
+
+    Returns:
+        Novo DataFrame com station_id (int16) no lugar de estacao/cidade/estado
+    """
+    from weather import station_record
+
+    header = station_record(df.attrs)
+    station_ids = {}
+    canonical = {}
+    for estacao in df['estacao'].dropna().unique():
+        if header and header['estacao'] == estacao:
+            record = header
+        else:
+            # Formato antigo: a estação vem das colunas ESTACAO/NOME/UF
+            rows = df[df['estacao'] == estacao]
+            record = {'estacao': estacao}
+            for col, target in (('cidade', 'nome'), ('estado', 'uf')):
+                if col in rows.columns and rows[col].notna().any():
+                    record[target] = rows[col].dropna().iloc[0]
+        station_ids[estacao], canonical[estacao] = _upsert_station(record)
+
+    ensure_weather_hourly_partitions(df['data_hora'].dt.year.dropna().unique())
+
+    hourly = df.drop(columns=['estacao', 'cidade', 'estado'], errors='ignore')
+    hourly.insert(0, 'station_id', df['estacao'].map(station_ids).astype('int16'))
+    required = [col for col in WEATHER_HOURLY_REQUIRED if col in hourly.columns]
+    if required:
+        hourly = hourly.dropna(subset=required)
+    if any(name != estacao for estacao, name in canonical.items()):
+        df['estacao'] = df['estacao'].map(canonical).astype('category')
+    return hourly
+
+
+# Chave primária de weather_hourly
+WEATHER_HOURLY_KEY = ['station_id', 'data_hora']
+
+
+def file_station(df: pd.DataFrame, filename: str) -> str:
+    """
+    Estação de um arquivo normalizado (normalize_inmet_file), mesmo que ele
+    não tenha nenhum registro: cabeçalho, coluna estacao ou nome do arquivo
+    """
+    from weather import station_slug, station_from_filename
+
+    if df.attrs.get('estacao'):
+        return station_slug(df.attrs['estacao'])
+    if len(df) and 'estacao' in df.columns:
+        return df['estacao'].iloc[0]
+    return station_from_filename(df.attrs.get('original_filename') or filename)
+
+
+def record_station_outages(df: pd.DataFrame, filename: str) -> int:
+    """
+    Grava em station_outages os intervalos sem medição de um arquivo
+    (df.attrs['outages'], ver weather.parsing.drop_empty_rows), substituindo
+    os registrados antes para o mesmo arquivo
+
+    Args:
+        df: DataFrame limpo (normalize_inmet_file)
+        filename: Nome do objeto de origem (arquivo_origem)
+
+    Returns:
+        Número de intervalos gravados
+    """
+    from weather import station_record
+
+    outages = df.attrs.get('outages') or []
+    station_id = None
+    if outages:
+        record = station_record(df.attrs) or {'estacao': file_station(df, filename)}
+        station_id = upsert_station(record)
+
+    with get_engine().begin() as conn:
+        conn.execute(text("DELETE FROM station_outages WHERE arquivo_origem = :filename"),
+                     {'filename': filename})
+        if outages:
+            conn.execute(text("""
+                INSERT INTO station_outages (station_id, inicio, fim, horas, arquivo_origem)
+                VALUES (:station_id, :inicio, :fim, :horas, :arquivo_origem)
+                ON CONFLICT (station_id, inicio) DO UPDATE SET
+                    fim = EXCLUDED.fim,
+                    horas = EXCLUDED.horas,
+                    arquivo_origem = EXCLUDED.arquivo_origem
+            """), [
+                {'station_id': station_id, 'inicio': inicio, 'fim': fim,
+                 'horas': horas, 'arquivo_origem': filename}
+                for inicio, fim, horas in outages
+            ])
+    return len(outages)
+
+
+class DataFrameCSVStream:
+    """
+    Objeto file-like que serializa um DataFrame em CSV sob demanda, em blocos
+    de linhas, para alimentar o COPY sem montar o CSV inteiro em memória
+    """
+
+    def __init__(self, df: pd.DataFrame, chunk_rows: int = 50000):
+        self._chunks = (
+            df.iloc[start:start + chunk_rows].to_csv(index=False, header=False)
+            for start in range(0, len(df), chunk_rows)
+        )
+        self._buffer = ''
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def copy_to_postgres(df: pd.DataFrame, table_name: str, key_columns: list = None,
+                     replace_file: str = None) -> int:
+    """
+    Carga em massa no PostgreSQL via COPY FROM STDIN (CSV) em uma tabela
+    temporária de staging, seguida de merge na tabela final. Registros cuja
+    chave já existe na tabela (ou repetidos no próprio DataFrame) são ignorados
+    com ON CONFLICT DO NOTHING, inclusive os inseridos por cargas concorrentes.
+
+    Args:
+        df: DataFrame a ser salvo (as colunas devem existir na tabela)
+        table_name: Nome da tabela
+        key_columns: Colunas da chave primária (ou UNIQUE) da tabela
+            (None = sem deduplicação)
+        replace_file: Se informado, remove antes (na mesma transação) os registros
+            com esse arquivo_origem, para recarregar um arquivo que mudou
+
+    Returns:
+        Número de registros inseridos
+    """
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    staging = f"staging_{table_name}"
+
+    if key_columns:
+        keys = ", ".join(f'"{col}"' for col in key_columns)
+        merge_sql = f"""
+            INSERT INTO {table_name} ({columns})
+            SELECT DISTINCT ON ({keys}) {columns}
+            FROM {staging}
+            ON CONFLICT ({keys}) DO NOTHING
+        """
+    else:
+        merge_sql = f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {staging}"
+
+    conn = get_engine().raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            # Staging com os mesmos tipos das colunas carregadas, sem constraints
+            cursor.execute(
+                f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {table_name} WITH NO DATA"
+            )
+            cursor.copy_expert(
+                f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                DataFrameCSVStream(df)
+            )
+            if replace_file is not None:
+                cursor.execute(f"DELETE FROM {table_name} WHERE arquivo_origem = %s", (replace_file,))
+            cursor.execute(merge_sql)
+            inserted = cursor.rowcount
+        conn.commit()
+        print(f"Dados salvos na tabela {table_name}: {inserted} registros (COPY)")
+        return inserted
+    except Exception as e:
+        conn.rollback()
+        print(f"Erro ao salvar no PostgreSQL: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+
+def daily_keys(df: pd.DataFrame) -> set:
+    """
+    Dias (estacao, data) cobertos por um DataFrame no formato de weather_hourly
+    """
+    import pandas as pd
+
+    if df.empty:
+        return set()
+    days = pd.DataFrame({
+        'estacao': df['estacao'],
+        'data': pd.to_datetime(df['data_hora']).dt.date,
+    }).dropna().drop_duplicates()
+    return set(days.itertuples(index=False, name=None))
+
+
+def get_file_daily_keys(filename: str) -> set:
+    """
+    Dias (estacao, data) com registros de um arquivo em weather_hourly. Usado
+    antes de recarregar um arquivo alterado, já que os dias que ele deixar
+    de cobrir também precisam ser recalculados.
+    """
+    query = text("""
+        SELECT DISTINCT s.estacao, CAST(h.data_hora AS DATE) AS data
+        FROM weather_hourly h
+        JOIN stations s ON s.station_id = h.station_id
+        WHERE h.arquivo_origem = :filename
+    """)
+    with get_engine().connect() as conn:
+        return {tuple(row) for row in conn.execute(query, {'filename': filename})}
+
+
+def refresh_weather_daily(days: set) -> int:
+    """
+    Recalcula weather_daily só para os dias (estacao, data) informados,
+    agregando weather_hourly no próprio PostgreSQL. O custo depende do número
+    de dias afetados, não do histórico inteiro.
+
+    Args:
+        days: Conjunto de tuplas (estacao, data), ver daily_keys
+
+    Returns:
+        Número de dias gravados em weather_daily
+    """
+    if not days:
+        return 0
+    estacoes, datas = zip(*sorted(days))
+    params = {'estacoes': list(estacoes), 'datas': list(datas)}
+
+    affected = """
+        WITH dias AS (
+            SELECT DISTINCT s.station_id, s.nome, d.estacao, d.data
+            FROM unnest(CAST(:estacoes AS VARCHAR[]), CAST(:datas AS DATE[])) AS d(estacao, data)
+            JOIN stations s ON s.estacao = d.estacao
+        )
+    """
+    # Dias que ficaram sem registros horários (arquivo recarregado) são removidos
+    delete_sql = text(affected + """
+        DELETE FROM weather_daily w
+        USING dias d
+        WHERE w.estacao = d.estacao AND w.data = d.data
+    """)
+    upsert_sql = text(affected + """
+        INSERT INTO weather_daily (
+            data, estacao, cidade,
+            temperatura_media, temperatura_max, temperatura_min,
+            umidade_media, pressao_media, velocidade_vento_media,
+            radiacao_solar_total, precipitacao_total
+        )
+        SELECT
+            d.data, d.estacao, MAX(d.nome),
+            AVG(h.temperatura), MAX(h.temperatura), MIN(h.temperatura),
+            AVG(h.umidade_relativa), AVG(h.pressao_atmosferica), AVG(h.velocidade_vento),
+            SUM(h.radiacao_solar), SUM(h.precipitacao)
+        FROM dias d
+        JOIN weather_hourly h
+          ON h.station_id = d.station_id
+         AND h.data_hora >= d.data
+         AND h.data_hora < d.data + 1
+        GROUP BY d.data, d.estacao
+        ON CONFLICT (data, estacao) DO UPDATE SET
+            cidade = EXCLUDED.cidade,
+            temperatura_media = EXCLUDED.temperatura_media,
+            temperatura_max = EXCLUDED.temperatura_max,
+            temperatura_min = EXCLUDED.temperatura_min,
+            umidade_media = EXCLUDED.umidade_media,
+            pressao_media = EXCLUDED.pressao_media,
+            velocidade_vento_media = EXCLUDED.velocidade_vento_media,
+            radiacao_solar_total = EXCLUDED.radiacao_solar_total,
+            precipitacao_total = EXCLUDED.precipitacao_total
+    """)
+    try:
+        with get_engine().begin() as conn:
+            conn.execute(delete_sql, params)
+            written = conn.execute(upsert_sql, params).rowcount
+        print(f"Agregação diária atualizada: {written} dias")
+        return written
+    except Exception as e:
+        print(f"Erro ao atualizar weather_daily: {str(e)}")
+        raise
+
+
+# Medições mantidas nos rollups (sql_scripts/02_rollups.sql)
+ROLLUP_MEASURES = [
+    'temperatura', 'umidade_relativa', 'pressao_atmosferica',
+    'velocidade_vento', 'radiacao_solar', 'precipitacao'
+]
+
+# Rollups do mais grosso ao mais fino. Cada grupo é recalculado a partir de
+# weather_hourly no intervalo [inicio, inicio + periodo); 'dimensions' mapeia
+# cada coluna do rollup para a expressão que a calcula (g = grupo, h = horário).
+ROLLUPS = [
+    {
+        'table': 'weather_monthly',
+        'period': 'month',
+        'dimensions': {
+            'estacao': 'g.estacao',
+            'ano': 'CAST(EXTRACT(YEAR FROM g.inicio) AS INTEGER)',
+            'mes': 'CAST(EXTRACT(MONTH FROM g.inicio) AS INTEGER)',
+        },
+    },
+    {
+        'table': 'weather_weekly',
+        'period': 'week',
+        'dimensions': {
+            'estacao': 'g.estacao',
+            'semana': 'g.inicio',
+        },
+    },
+    {
+        'table': 'weather_hourly_profile',
+        'period': 'month',
+        'dimensions': {
+            'estacao': 'g.estacao',
+            'ano': 'CAST(EXTRACT(YEAR FROM g.inicio) AS INTEGER)',
+            'mes': 'CAST(EXTRACT(MONTH FROM g.inicio) AS INTEGER)',
+            'hora': 'CAST(EXTRACT(HOUR FROM h.data_hora) AS INTEGER)',
+        },
+    },
+]
+
+# Dimensões disponíveis nos registros horários (consulta sem rollup, na view
+# weather_hourly_stations, que traz o nome da estação)
+HOURLY_DIMENSIONS = {
+    'estacao': 'estacao',
+    'ano': 'ano',
+    'mes': 'mes',
+    'hora': 'hora',
+    'semana': "CAST(DATE_TRUNC('week', data_hora) AS DATE)",
+    'data': 'CAST(data_hora AS DATE)',
+}
+
+ROLLUP_AGGREGATIONS = {
+    'mean': 'SUM({m}_soma) / NULLIF(SUM({m}_n), 0)',
+    'sum': 'SUM({m}_soma)',
+    'count': 'SUM({m}_n)',
+    'min': 'MIN({m}_min)',
+    'max': 'MAX({m}_max)',
+}
+HOURLY_AGGREGATIONS = {
+    'mean': 'AVG({m})',
+    'sum': 'SUM({m})',
+    'count': 'COUNT({m})',
+    'min': 'MIN({m})',
+    'max': 'MAX({m})',
+}
+
+
+def refresh_rollups(days: set):
+    """
+    Recalcula os rollups (mensal, semanal e ciclo diário) só para os grupos
+    que contêm os dias (estacao, data) informados, a partir de weather_hourly.
+    Cada grupo é apagado e regravado na mesma transação; a gravação usa
+    ON CONFLICT, pois cargas paralelas de anos consecutivos da mesma estação
+    recalculam a semana que cruza a virada do ano ao mesmo tempo.
+
+    Args:
+        days: Conjunto de tuplas (estacao, data), ver daily_keys
+    """
+    if not days:
+        return
+
+    periods = {
+        'month': {(estacao, data.replace(day=1)) for estacao, data in days},
+        'week': {(estacao, data - timedelta(days=data.weekday())) for estacao, data in days},
+    }
+    measures_sql = ",\n".join(
+        f"SUM(h.{m}), COUNT(h.{m}), MIN(h.{m}), MAX(h.{m})" for m in ROLLUP_MEASURES
+    )
+    measure_columns = ", ".join(
+        f"{m}_soma, {m}_n, {m}_min, {m}_max" for m in ROLLUP_MEASURES
+    )
+    update_sql = ",\n".join(
+        f"{col} = EXCLUDED.{col}"
+        for col in ['n_registros'] + [f"{m}_{stat}" for m in ROLLUP_MEASURES for stat in ('soma', 'n', 'min', 'max')]
+    )
+
+    try:
+        with get_engine().begin() as conn:
+            for rollup in ROLLUPS:
+                groups = sorted(periods[rollup['period']])
+                estacoes, inicios = zip(*groups)
+                params = {'estacoes': list(estacoes), 'inicios': list(inicios)}
+                dimensions = rollup['dimensions']
+                group_keys = [col for col in dimensions if col != 'hora']
+
+                affected = """
+                    WITH g AS (
+                        SELECT DISTINCT s.station_id, u.estacao, u.inicio
+                        FROM unnest(CAST(:estacoes AS VARCHAR[]), CAST(:inicios AS DATE[])) AS u(estacao, inicio)
+                        JOIN stations s ON s.estacao = u.estacao
+                    )
+                """
+                match = " AND ".join(f"r.{col} = {dimensions[col]}" for col in group_keys)
+                conn.execute(text(affected + f"""
+                    DELETE FROM {rollup['table']} r USING g WHERE {match}
+                """), params)
+                conn.execute(text(affected + f"""
+                    INSERT INTO {rollup['table']} ({", ".join(dimensions)}, n_registros, {measure_columns})
+                    SELECT {", ".join(dimensions.values())}, COUNT(*),
+                           {measures_sql}
+                    FROM g
+                    JOIN weather_hourly h
+                      ON h.station_id = g.station_id
+                     AND h.data_hora >= g.inicio
+                     AND h.data_hora < g.inicio + INTERVAL '1 {rollup['period']}'
+                    GROUP BY {", ".join(dimensions.values())}
+                    ON CONFLICT ({", ".join(dimensions)}) DO UPDATE SET
+                    {update_sql}
+                """), params)
+        print(f"Rollups atualizados: {len(periods['month'])} meses, {len(periods['week'])} semanas")
+    except Exception as e:
+        print(f"Erro ao atualizar rollups: {str(e)}")
+        raise
+
+
+def rebuild_rollups():
+    """
+    Recalcula todos os rollups a partir de weather_hourly (carga inicial ou
+    após aplicar sql_scripts/02_rollups.sql em um banco existente)
+    """
+    query = text("""
+        SELECT DISTINCT s.estacao, CAST(h.data_hora AS DATE) AS data
+        FROM weather_hourly h
+        JOIN stations s ON s.station_id = h.station_id
+    """)
+    with get_engine().connect() as conn:
+        days = {tuple(row) for row in conn.execute(query)}
+    refresh_rollups(days)
+
+
+def query_aggregate(measures, by=('estacao',), agg: str = 'mean',
+                    estacao=None, ano=None, mes=None) -> pd.DataFrame:
+    """
+    Calcula um agregado de weather_hourly usando o rollup mais grosso capaz de
+    respondê-lo (mensal -> semanal -> ciclo diário); só consulta os registros
+    horários quando nenhum rollup tem as dimensões pedidas (ex.: by='data').
+
+    Args:
+        measures: Medição ou lista de medições (ver ROLLUP_MEASURES)
+        by: Dimensões do agrupamento: estacao, ano, mes, semana, hora, data
+        agg: 'mean', 'sum', 'count', 'min' ou 'max'
+        estacao, ano, mes: Filtros opcionais (valor único ou lista)
+
+    Returns:
+        DataFrame com uma linha por grupo e uma coluna por medição
+
+    Exemplo:
+        query_aggregate('temperatura', by=['estacao', 'mes', 'hora'], estacao='recife')
+    """
+    import pandas as pd
+
+    measures = [measures] if isinstance(measures, str) else list(measures)
+    by = [by] if isinstance(by, str) else list(by)
+    filters = {
+        col: list(value) if isinstance(value, (list, tuple, set)) else [value]
+        for col, value in (('estacao', estacao), ('ano', ano), ('mes', mes))
+        if value is not None
+    }
+    unknown = set(measures) - set(ROLLUP_MEASURES)
+    if unknown:
+        raise ValueError(f"Medições sem rollup: {sorted(unknown)}")
+    if agg not in ROLLUP_AGGREGATIONS:
+        raise ValueError(f"Agregação inválida: {agg}")
+
+    needed = set(by) | set(filters)
+    rollup = next((r for r in ROLLUPS if needed <= set(r['dimensions'])), None)
+    if rollup is not None:
+        table = rollup['table']
+        dimensions = {col: col for col in rollup['dimensions']}
+        aggregations = ROLLUP_AGGREGATIONS
+    else:
+        table = 'weather_hourly_stations'
+        dimensions = HOURLY_DIMENSIONS
+        aggregations = HOURLY_AGGREGATIONS
+        if not needed <= set(dimensions):
+            raise ValueError(f"Dimensões inválidas: {sorted(needed - set(dimensions))}")
+
+    select = [f"{dimensions[col]} AS {col}" for col in by]
+    select += [f"{aggregations[agg].format(m=m)} AS {m}" for m in measures]
+    where = [f"{dimensions[col]} = ANY(:{col})" for col in filters]
+
+    query = f"SELECT {', '.join(select)} FROM {table}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    if by:
+        positions = ", ".join(str(i) for i in range(1, len(by) + 1))
+        query += f" GROUP BY {positions} ORDER BY {positions}"
+
+    print(f"Consulta respondida por {table}")
+    with get_engine().connect() as conn:
+        return pd.read_sql(text(query), conn, params=filters)
+
+
 def setup_mlflow_experiment(experiment_name: str):
     """
-    Configura experimento no MLFlow
+    Configura experimento no MLFlow (e o tracking URI)
     
     Args:
         experiment_name: Nome do experimento
     """
+    import mlflow
+
     try:
+        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
         mlflow.set_experiment(experiment_name)
         print(f"Experimento '{experiment_name}' configurado")
     except Exception as e:
         print(f"Erro ao configurar experimento: {str(e)}")
         raise
 
+
+def __getattr__(name: str):
+    """
+    Conexões compartilhadas acessadas como atributos do módulo
+    (`from utils import engine`), criadas só no primeiro acesso
+    """
+    if name == 'engine':
+        return get_engine()
+    if name == 's3_client':
+        return get_s3_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
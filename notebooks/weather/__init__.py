@@ -0,0 +1,48 @@
+"""
+Leitura e normalização dos dados meteorológicos do INMET, compartilhadas
+pelos scripts de ingestão, notebooks e API
+
+Os nomes abaixo são carregados sob demanda: `import weather` (ou
+`weather.schema` / `weather.resources` / `weather.compression`) não
+importa pandas nem numpy.
+"""
+import importlib
+
+# nome exportado -> submódulo que o define
+_EXPORTS = {
+    'SCHEMA_VERSION': 'schema',
+    'COLUMN_MAPPING': 'schema',
+    'NUMERIC_COLUMNS': 'schema',
+    'RELEVANT_COLUMNS': 'schema',
+    'COMPACT_DTYPES': 'schema',
+    'find_inmet_header': 'parsing',
+    'parse_inmet_metadata': 'parsing',
+    'parse_inmet_csv': 'parsing',
+    'drop_empty_rows': 'parsing',
+    'outage_intervals': 'parsing',
+    'clean_weather_data': 'cleaning',
+    'compact_dtypes': 'cleaning',
+    'station_from_filename': 'cleaning',
+    'station_slug': 'cleaning',
+    'station_record': 'cleaning',
+    'normalize_inmet_file': 'cleaning',
+    'StationSeries': 'series',
+    'hour_offsets': 'series',
+    'RAW_COMPRESSION': 'compression',
+    'compress_bytes': 'compression',
+    'content_encoding_args': 'compression',
+    'read_body': 'compression',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
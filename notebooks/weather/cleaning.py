@@ -0,0 +1,229 @@
+"""
+Limpeza e normalização dos dados meteorológicos do INMET
+
+Único caminho de limpeza usado pelo processamento (02_processamento_limpeza),
+pela carga direta no PostgreSQL (carregar_dados_postgresql) e pela API, para
+que todos produzam exatamente a mesma saída (ver schema.SCHEMA_VERSION).
+"""
+import re
+import unicodedata
+from datetime import datetime
+
+import pandas as pd
+
+from .parsing import parse_hora_utc, parse_inmet_csv
+from .schema import (
+    SCHEMA_VERSION,
+    COLUMN_MAPPING,
+    COMPACT_DTYPES,
+    DATE_COLUMNS,
+    HOUR_COLUMNS,
+    NUMERIC_COLUMNS,
+    RELEVANT_COLUMNS,
+    VALUE_LIMITS,
+)
+
+
+def to_number(values: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna para float. Colunas já numéricas (o parser lê as
+    medições com vírgula decimal) passam direto; texto é convertido em uma
+    única passada (vírgula -> ponto, inválidos -> NaN).
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64", copy=False)
+    return pd.to_numeric(
+        values.astype(str).str.strip().str.replace(",", ".", regex=False),
+        errors="coerce"
+    )
+
+
+def clean_weather_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Limpa e trata dados meteorológicos, preservando DATA + HORA corretamente
+    e preservando números (corrige vírgula decimal -> ponto).
+
+    Só as colunas do esquema são copiadas; data_hora é montada
+    aritmeticamente (data + minutos da hora) em vez de concatenar texto.
+    Valores fora das faixas de VALUE_LIMITS viram NaN.
+    """
+
+    # ============================================================
+    # 1. Mapear nomes de colunas para nomes padronizados
+    # ============================================================
+
+    source_columns = {}
+    for col in df.columns:
+        target = COLUMN_MAPPING.get(col, col)
+        if target in RELEVANT_COLUMNS and target not in source_columns:
+            source_columns[target] = col
+
+    date_column = next((col for col in DATE_COLUMNS if col in df.columns), None)
+    hour_column = next((col for col in HOUR_COLUMNS if col in df.columns), None)
+
+    # ============================================================
+    # 2. Construção / detecção da coluna data_hora
+    # ============================================================
+
+    # Se já existe data_hora, usa ela
+    if "data_hora" in source_columns:
+        data_hora = pd.to_datetime(df[source_columns["data_hora"]], errors="coerce")
+
+    # Caso INMET tradicional: Data + Hora UTC
+    elif date_column is not None and hour_column is not None:
+        # ~365 datas distintas por arquivo: o cache do to_datetime interpreta cada uma uma vez
+        datas = pd.to_datetime(
+            df[date_column], format=DATE_COLUMNS[date_column], errors="coerce", cache=True
+        )
+        minutos = parse_hora_utc(df[hour_column])
+        data_hora = datas + pd.to_timedelta(minutos, unit="m")
+
+    # Caso exista só a data
+    elif date_column is not None:
+        data_hora = pd.to_datetime(df[date_column], errors="coerce")
+
+    else:
+        raise ValueError("Nenhuma coluna de data encontrada no arquivo!")
+
+    # Remover registros sem data válida
+    valid = data_hora.notna().to_numpy()
+    all_valid = valid.all()
+    if not all_valid:
+        data_hora = data_hora[valid]
+
+    # ============================================================
+    # 3. Normalização dos valores numéricos (com vírgula → ponto)
+    # ============================================================
+
+    columns = {"data_hora": data_hora}
+    for target, source in source_columns.items():
+        if target == "data_hora":
+            continue
+        values = df[source] if all_valid else df[source][valid]
+        if target in NUMERIC_COLUMNS:
+            values = to_number(values)
+            if target in VALUE_LIMITS:
+                low, high = VALUE_LIMITS[target]
+                values = values.where(values.between(low, high))
+        columns[target] = values
+
+    # ============================================================
+    # 4. Quebrar data em partes
+    # ============================================================
+
+    columns["ano"] = data_hora.dt.year
+    columns["mes"] = data_hora.dt.month
+    columns["dia"] = data_hora.dt.day
+    columns["hora"] = data_hora.dt.hour
+
+    # ============================================================
+    # 5. Manter somente colunas relevantes (as que realmente existem)
+    # ============================================================
+
+    df_clean = pd.DataFrame({col: columns[col] for col in RELEVANT_COLUMNS if col in columns})
+    df_clean.attrs = dict(df.attrs)
+    df_clean.attrs["schema_version"] = SCHEMA_VERSION
+    return df_clean
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas do esquema para os tipos de COMPACT_DTYPES
+    (category, int8/int16, float32), sem copiar as que já estão no tipo certo.
+    Colunas fora do esquema ficam como estão.
+
+    Returns:
+        O próprio DataFrame, convertido no lugar
+    """
+    for col, dtype in COMPACT_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def station_from_filename(filename: str) -> str:
+    """
+    Extrai o identificador da estação do nome do arquivo
+    ("upload_20251203_dados_serra_talhada_2020.CSV" -> "serra_talhada").
+    Usado só para arquivos sem o bloco de metadados (ver station_slug).
+    """
+    match = re.search(r"dados_([a-z_]+?)_\d{4}", filename.lower())
+    return match.group(1) if match else "desconhecida"
+
+
+def station_slug(name: str) -> str:
+    """
+    Identificador da estação a partir do nome do cabeçalho do INMET
+    ("SERRA TALHADA" -> "serra_talhada", "CABROBÓ" -> "cabrobo"), o mesmo
+    usado nos nomes dos arquivos
+    """
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", ascii_name.lower()).strip("_")
+
+
+def parse_data_fundacao(value: str):
+    """
+    Data de fundação do cabeçalho ("20/11/04" = 20/11/2004 ou "2004-11-20");
+    None se vazia ou em formato desconhecido
+    """
+    for fmt in ("%d/%m/%y", "%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except (AttributeError, ValueError):
+            continue
+    return None
+
+
+def station_record(metadata: dict) -> dict:
+    """
+    Registro da dimensão stations a partir dos metadados do cabeçalho
+    (df.attrs de parse_inmet_csv / normalize_inmet_file)
+
+    Returns:
+        Dicionário com estacao, codigo_wmo, nome, uf, regiao, latitude,
+        longitude, altitude e data_fundacao; vazio se o arquivo não tem o
+        nome da estação no cabeçalho
+    """
+    if not metadata.get("estacao"):
+        return {}
+    return {
+        "estacao": station_slug(metadata["estacao"]),
+        "codigo_wmo": metadata.get("codigo_wmo") or None,
+        "nome": metadata["estacao"],
+        "uf": metadata.get("uf") or None,
+        "regiao": metadata.get("regiao") or None,
+        "latitude": metadata.get("latitude"),
+        "longitude": metadata.get("longitude"),
+        "altitude": metadata.get("altitude"),
+        "data_fundacao": parse_data_fundacao(metadata.get("data_fundacao")),
+    }
+
+
+def normalize_inmet_file(raw_bytes: bytes, filename: str, original_filename: str = None) -> pd.DataFrame:
+    """
+    Converte os bytes de um CSV bruto do INMET no DataFrame limpo que é
+    gravado em processed/ e em weather_hourly
+
+    Args:
+        raw_bytes: Conteúdo do arquivo
+        filename: Nome do objeto de origem (vira arquivo_origem)
+        original_filename: Nome do arquivo enviado, quando o objeto é nomeado
+            pelo conteúdo (padrão: a coluna original_filename gravada pelo
+            /upload, se houver)
+
+    Returns:
+        DataFrame no esquema SCHEMA_VERSION, com arquivo_origem e estacao,
+        nos tipos compactos de COMPACT_DTYPES
+    """
+    df = parse_inmet_csv(raw_bytes)
+    if original_filename is None and "original_filename" in df.columns and len(df):
+        original_filename = df["original_filename"].iloc[0]
+    df_clean = clean_weather_data(df)
+    df_clean["arquivo_origem"] = filename
+    if original_filename:
+        df_clean.attrs["original_filename"] = original_filename
+    if "estacao" not in df_clean.columns:
+        # A estação vem do cabeçalho; o nome do arquivo é só o último recurso
+        nome = df_clean.attrs.get("estacao")
+        df_clean["estacao"] = station_slug(nome) if nome else station_from_filename(original_filename or filename)
+    return compact_dtypes(df_clean)
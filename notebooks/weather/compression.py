@@ -0,0 +1,116 @@
+"""
+Compressão dos objetos CSV gravados no MinIO (Content-Encoding gzip ou zstd)
+
+Os CSVs do INMET comprimem muito bem (longas sequências de ";;;;" nas horas
+sem medição). A compressão na escrita é opcional e configurada por
+RAW_COMPRESSION ('gzip', 'zstd' ou 'none'); o codec usado fica registrado no
+Content-Encoding do objeto, e os leitores descomprimem de forma transparente,
+inclusive objetos antigos sem compressão. zstd requer o pacote `zstandard`.
+"""
+import gzip
+import os
+import zlib
+
+RAW_COMPRESSION = os.getenv("RAW_COMPRESSION", "none").lower()
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+ENCODINGS = ("gzip", "zstd")
+
+# Assinaturas usadas quando o objeto não tem Content-Encoding
+_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Compressão zstd requer o pacote zstandard (pip install zstandard)")
+    return zstandard
+
+
+def normalize_encoding(encoding: str = None):
+    """
+    Codec de compressão a usar: o informado ou, se None, RAW_COMPRESSION
+
+    Returns:
+        'gzip', 'zstd' ou None (sem compressão)
+    """
+    encoding = (RAW_COMPRESSION if encoding is None else encoding).lower()
+    if encoding in ("", "none", "identity"):
+        return None
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Compressão inválida: {encoding}. Use uma das: {', '.join(ENCODINGS)} ou none")
+    return encoding
+
+
+def content_encoding_args(encoding: str = None) -> dict:
+    """Argumentos extras do S3 (ExtraArgs) para um objeto comprimido com `encoding`"""
+    encoding = normalize_encoding(encoding)
+    return {"ContentEncoding": encoding} if encoding else {}
+
+
+def compressor(encoding: str):
+    """
+    Compressor incremental, com compress(bytes) e flush(), para gravar em
+    streaming; None se `encoding` não comprime
+    """
+    encoding = normalize_encoding(encoding)
+    if encoding == "gzip":
+        # wbits=31: formato gzip (cabeçalho sem data, saída determinística)
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    if encoding == "zstd":
+        return _zstandard().ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return None
+
+
+def compress_bytes(data: bytes, encoding: str = None) -> bytes:
+    """Comprime `data` com o codec `encoding` (padrão: RAW_COMPRESSION)"""
+    compress = compressor(encoding)
+    if compress is None:
+        return data
+    return compress.compress(data) + compress.flush()
+
+
+def detect_encoding(head: bytes):
+    """Codec de um conteúdo pelos primeiros bytes, ou None se não comprimido"""
+    for magic, encoding in _MAGIC.items():
+        if head.startswith(magic):
+            return encoding
+    return None
+
+
+def decompress_bytes(data: bytes, encoding: str = None) -> bytes:
+    """
+    Descomprime `data`; sem `encoding`, o codec é detectado pelos primeiros
+    bytes e conteúdos não comprimidos são devolvidos como estão
+    """
+    encoding = detect_encoding(data[:4]) if encoding is None else normalize_encoding(encoding)
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        return _zstandard().ZstdDecompressor().stream_reader(data).read()
+    return data
+
+
+def read_body(body, content_encoding: str = None) -> bytes:
+    """
+    Lê o corpo de um objeto do S3 (resposta do get_object), descomprimindo
+    em streaming conforme o Content-Encoding
+
+    Args:
+        body: Stream do corpo (response['Body'])
+        content_encoding: response.get('ContentEncoding')
+    """
+    encoding = (content_encoding or "").lower()
+    if encoding == "gzip":
+        with gzip.GzipFile(fileobj=body) as f:
+            return f.read()
+    if encoding == "zstd":
+        with _zstandard().ZstdDecompressor().stream_reader(body) as f:
+            return f.read()
+    # Sem Content-Encoding (ou desconhecido): detecta pelo conteúdo
+    return decompress_bytes(body.read())
@@ -0,0 +1,240 @@
+"""
+Leitura dos CSVs brutos do INMET (metadados da estação + medições)
+"""
+import re
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .schema import (
+    DATE_COLUMNS,
+    HOUR_COLUMNS,
+    INMET_HEADER_MARKERS,
+    INMET_METADATA_KEYS,
+    INMET_NUMERIC_METADATA,
+    INMET_TEXT_COLUMNS,
+)
+
+
+def find_inmet_header(raw_bytes: bytes, complete: bool = True) -> int:
+    """
+    Localiza o cabeçalho ("Data;", "DATA;"...) diretamente nos bytes do
+    arquivo, sem decodificar o texto
+
+    Args:
+        raw_bytes: Conteúdo do arquivo (ou apenas o início dele)
+        complete: Indica se `raw_bytes` contém o arquivo inteiro; se não, o
+            cabeçalho só é aceito quando a linha já termina em `raw_bytes`
+
+    Returns:
+        Offset em bytes do início da linha de cabeçalho, ou -1
+    """
+    offsets = []
+    for marker in INMET_HEADER_MARKERS:
+        if raw_bytes.startswith(marker):
+            offsets.append(0)
+            continue
+        pos = raw_bytes.find(b'\n' + marker)
+        if pos >= 0:
+            offsets.append(pos + 1)
+    if not offsets:
+        return -1
+
+    offset = min(offsets)
+    if not complete and raw_bytes.find(b'\n', offset) < 0:
+        return -1
+    return offset
+
+
+def parse_inmet_metadata(preamble: bytes) -> dict:
+    """
+    Converte o bloco de metadados da estação (REGIAO, UF, ESTACAO,
+    CODIGO (WMO), LATITUDE...) em um dicionário com chaves padronizadas
+    """
+    metadata = {}
+    for line in preamble.decode('latin1').splitlines():
+        key, sep, value = line.partition(':;')
+        name = INMET_METADATA_KEYS.get(key.strip().upper())
+        if not sep or name is None:
+            continue
+        value = value.strip().rstrip(';')
+        if name in INMET_NUMERIC_METADATA:
+            try:
+                value = float(value.replace(',', '.'))
+            except ValueError:
+                value = None
+        metadata[name] = value
+    return metadata
+
+
+def parse_hora_utc(hora: pd.Series) -> pd.Series:
+    """
+    Converte a coluna "Hora UTC" ("0000 UTC", "1300 UTC", "13:00"...) em
+    minutos desde a meia-noite. Só os valores distintos (no máximo 24) são
+    interpretados como texto; o resultado é espalhado por indexação.
+    """
+    codes, uniques = pd.factorize(hora)
+    hhmm = pd.to_numeric(
+        pd.Series(uniques, dtype=str)
+        .str.replace(" UTC", "", regex=False)
+        .str.replace(":", "", regex=False)
+        .str.strip(),
+        errors="coerce"
+    ).to_numpy(dtype="float64")
+    minutes = (hhmm // 100) * 60 + hhmm % 100
+    # código -1 = valor ausente
+    minutes = np.append(minutes, np.nan)
+    return pd.Series(minutes[codes], index=hora.index)
+
+
+def drop_empty_rows(raw_bytes: bytes, header_offset: int, columns: list) -> tuple:
+    """
+    Remove, direto nos bytes, as linhas sem nenhuma medição
+    ("2023/01/01;0000 UTC;;;;;;;;;;;;;;;;;;"), que o INMET grava nas horas
+    em que a estação ficou fora do ar. Só se aplica ao layout
+    Data;Hora;medições...; colunas extras depois das medições (ingestion_date,
+    source...) são ignoradas na verificação.
+
+    As linhas vazias vêm em sequências (uma por interrupção): cada sequência
+    é localizada pela série de ";" das medições vazias (bytes.find) e
+    consumida de uma vez por uma expressão regular ancorada no início dela.
+
+    Args:
+        raw_bytes: Conteúdo do arquivo
+        header_offset: Posição do cabeçalho (find_inmet_header)
+        columns: Nomes das colunas do cabeçalho
+
+    Returns:
+        Tupla (bytes sem as linhas vazias, sequências removidas), cada
+        sequência como ((data, hora) da primeira linha, (data, hora) da
+        última, número de linhas), com data e hora em bytes
+    """
+    if len(columns) < 3 or columns[0] not in DATE_COLUMNS or columns[1] not in HOUR_COLUMNS:
+        return raw_bytes, []
+    # Medições: da 3ª coluna até a última que não é texto (a coluna sem nome
+    # no fim do cabeçalho do INMET é sempre vazia)
+    measurements = [i for i, col in enumerate(columns) if col and col not in INMET_TEXT_COLUMNS]
+    if not measurements or measurements[0] != 2:
+        return raw_bytes, []
+
+    header_end = raw_bytes.find(b'\n', header_offset)
+    if header_end < 0:
+        return raw_bytes, []
+    empty_run = b';' * (measurements[-1] - 1)
+    empty_line = rb'[^;\r\n]*;[^;\r\n]*' + re.escape(empty_run) + rb'(?:;[^\r\n]*)?(?:\r?\n|\r?\Z)'
+    empty_block = re.compile(rb'(?:' + empty_line + rb')+')
+
+    pieces = [raw_bytes[:header_end + 1]]
+    blocks = []
+    pos = header_end + 1
+    search = pos
+    while True:
+        found = raw_bytes.find(empty_run, search)
+        if found < 0:
+            break
+        line_start = raw_bytes.rfind(b'\n', 0, found) + 1
+        block = empty_block.match(raw_bytes, line_start)
+        if block is None:
+            # Sequência de ";" dentro de uma linha com medições
+            search = found + len(empty_run)
+            continue
+
+        end = block.end()
+        lines = raw_bytes.count(b'\n', line_start, end)
+        if not raw_bytes.endswith(b'\n', 0, end):
+            lines += 1
+        last_start = raw_bytes.rfind(b'\n', 0, end - 1) + 1
+        first = raw_bytes[line_start:found].split(b';')
+        last = raw_bytes[last_start:raw_bytes.find(empty_run, last_start)].split(b';')
+        blocks.append(((first[0], first[1]), (last[0], last[1]), lines))
+
+        pieces.append(raw_bytes[pos:line_start])
+        pos = search = end
+    if not blocks:
+        return raw_bytes, []
+    pieces.append(raw_bytes[pos:])
+    return b''.join(pieces), blocks
+
+
+def outage_intervals(blocks: list, date_format: str = None) -> list:
+    """
+    Intervalos sem medição a partir das sequências removidas por
+    drop_empty_rows
+
+    Args:
+        blocks: Sequências ((data, hora) inicial, (data, hora) final, linhas)
+        date_format: Formato da coluna de data (DATE_COLUMNS)
+
+    Returns:
+        Lista de [início, fim, horas], com início e fim em ISO 8601
+    """
+    if not blocks:
+        return []
+    bounds = [bound for first, last, _ in blocks for bound in (first, last)]
+    datas = pd.to_datetime(
+        pd.Series([data for data, _ in bounds]).str.decode('latin1'),
+        format=date_format, errors='coerce'
+    )
+    minutos = parse_hora_utc(pd.Series([hora for _, hora in bounds]).str.decode('latin1'))
+    data_hora = (datas + pd.to_timedelta(minutos, unit='m')).to_numpy(dtype='datetime64[s]')
+
+    intervals = []
+    for i, (_, _, lines) in enumerate(blocks):
+        start, end = data_hora[2 * i], data_hora[2 * i + 1]
+        if np.isnat(start) or np.isnat(end):
+            continue
+        intervals.append([str(start), str(end), lines])
+    return intervals
+
+
+def parse_inmet_csv(raw_bytes: bytes, drop_empty: bool = True) -> pd.DataFrame:
+    """
+    Converte o conteúdo bruto de um CSV do INMET em DataFrame, detectando
+    automaticamente a linha do cabeçalho.
+
+    As medições são convertidas para float já na leitura (vírgula decimal),
+    com o parser em C do pandas. Os metadados da estação (regiao, uf,
+    estacao, codigo_wmo, latitude, longitude, altitude, data_fundacao)
+    ficam disponíveis em `df.attrs`.
+
+    Com drop_empty, as linhas sem nenhuma medição são descartadas antes do
+    parser (drop_empty_rows) e os intervalos correspondentes ficam em
+    `df.attrs['outages']` (ver outage_intervals).
+    """
+    # Detectar o cabeçalho real direto nos bytes
+    header_offset = find_inmet_header(raw_bytes)
+    if header_offset < 0:
+        raise ValueError("Não foi possível identificar o cabeçalho (linha 'Data;Hora') no CSV.")
+
+    metadata = parse_inmet_metadata(raw_bytes[:header_offset])
+
+    # Tipos explícitos: texto para data/hora/metadados, float para medições
+    header_end = raw_bytes.find(b'\n', header_offset)
+    header = raw_bytes[header_offset:header_end if header_end >= 0 else None]
+    columns = header.decode('latin1').rstrip('\r').split(';')
+    dtype = {
+        col: (str if col in INMET_TEXT_COLUMNS else 'float64')
+        for col in columns if col
+    }
+
+    outages = []
+    if drop_empty:
+        raw_bytes, blocks = drop_empty_rows(raw_bytes, header_offset, columns)
+        outages = outage_intervals(blocks, DATE_COLUMNS.get(columns[0]))
+
+    # BytesIO sobre um objeto bytes compartilha o buffer (sem cópia);
+    # basta posicionar o cursor no cabeçalho
+    buffer = BytesIO(raw_bytes)
+    try:
+        buffer.seek(header_offset)
+        df = pd.read_csv(buffer, sep=";", decimal=",", encoding="latin1", dtype=dtype)
+    except ValueError:
+        # Valor não numérico em alguma medição: deixar o pandas inferir os tipos
+        buffer.seek(header_offset)
+        df = pd.read_csv(buffer, sep=";", decimal=",", encoding="latin1")
+
+    df.attrs.update(metadata)
+    if drop_empty:
+        df.attrs['outages'] = outages
+    return df
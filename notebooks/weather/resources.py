@@ -0,0 +1,116 @@
+"""
+Conexões compartilhadas (PostgreSQL e MinIO) com pool configurável
+
+O engine do SQLAlchemy e o cliente S3 são criados no primeiro uso e
+reaproveitados por todo o processo (scripts, notebooks e API), em vez de cada
+módulo montar o seu. Tamanhos de pool vêm de variáveis de ambiente:
+
+    POSTGRES_POOL_SIZE       conexões mantidas abertas (padrão: 5)
+    POSTGRES_MAX_OVERFLOW    conexões extras em picos (padrão: 2 por núcleo, mínimo 10)
+    POSTGRES_POOL_RECYCLE    segundos até reabrir uma conexão (padrão: 1800)
+    POSTGRES_POOL_TIMEOUT    segundos de espera por uma conexão livre (padrão: 30)
+    S3_MAX_POOL_CONNECTIONS  conexões HTTP do cliente S3 (padrão: 2 por núcleo + 1)
+"""
+import os
+import threading
+
+# Configuração MinIO
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
+MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
+MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
+
+# Configuração PostgreSQL
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres")
+POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
+POSTGRES_DB = os.getenv("POSTGRES_DB", "weather_db")
+
+DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+
+# Pools
+POSTGRES_POOL_SIZE = int(os.getenv("POSTGRES_POOL_SIZE", "5"))
+POSTGRES_MAX_OVERFLOW = int(os.getenv("POSTGRES_MAX_OVERFLOW", max(10, 2 * (os.cpu_count() or 1))))
+POSTGRES_POOL_RECYCLE = int(os.getenv("POSTGRES_POOL_RECYCLE", "1800"))
+POSTGRES_POOL_TIMEOUT = int(os.getenv("POSTGRES_POOL_TIMEOUT", "30"))
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 2 * (os.cpu_count() or 1) + 1))
+
+_lock = threading.Lock()
+_engines = {}
+_s3_clients = {}
+
+
+def get_engine(url: str = None):
+    """
+    Engine do SQLAlchemy com pool de conexões, criado no primeiro uso
+
+    As conexões são testadas antes do uso (pool_pre_ping) e recicladas
+    periodicamente, então um PostgreSQL reiniciado não derruba o processo.
+
+    Args:
+        url: URL do banco (padrão: DATABASE_URL)
+    """
+    url = url or DATABASE_URL
+    engine = _engines.get(url)
+    if engine is None:
+        with _lock:
+            engine = _engines.get(url)
+            if engine is None:
+                from sqlalchemy import create_engine
+
+                engine = create_engine(
+                    url,
+                    pool_size=POSTGRES_POOL_SIZE,
+                    max_overflow=POSTGRES_MAX_OVERFLOW,
+                    pool_recycle=POSTGRES_POOL_RECYCLE,
+                    pool_timeout=POSTGRES_POOL_TIMEOUT,
+                    pool_pre_ping=True,
+                )
+                _engines[url] = engine
+    return engine
+
+
+def get_s3_client(max_pool_connections: int = None):
+    """
+    Cliente S3 (MinIO) compartilhado, criado no primeiro uso. O cliente do
+    boto3 é thread-safe; o pool HTTP deve ter ao menos uma conexão por
+    thread que faz download/upload em paralelo.
+
+    Args:
+        max_pool_connections: Conexões HTTP do pool (padrão: S3_MAX_POOL_CONNECTIONS)
+    """
+    size = max_pool_connections or S3_MAX_POOL_CONNECTIONS
+    client = _s3_clients.get(size)
+    if client is None:
+        with _lock:
+            client = _s3_clients.get(size)
+            if client is None:
+                import boto3
+                from botocore.client import Config
+
+                client = boto3.client(
+                    's3',
+                    endpoint_url=f'http://{MINIO_ENDPOINT}',
+                    aws_access_key_id=MINIO_ACCESS_KEY,
+                    aws_secret_access_key=MINIO_SECRET_KEY,
+                    config=Config(signature_version='s3v4', max_pool_connections=size),
+                    region_name='us-east-1'
+                )
+                _s3_clients[size] = client
+    return client
+
+
+def _reset_after_fork():
+    """
+    Processos filhos (ProcessPoolExecutor) não podem reutilizar as conexões
+    do pai: descarta os pools herdados sem fechá-los (o engine continua válido
+    e abre conexões novas) e recria os clientes S3 sob demanda
+    """
+    global _lock
+    _lock = threading.Lock()
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    _s3_clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,108 @@
+"""
+Esquema versionado dos dados meteorológicos do INMET
+
+Define como os CSVs brutos são lidos e normalizados. Qualquer mudança que
+altere o resultado da limpeza (colunas, tipos, faixas válidas) deve
+incrementar SCHEMA_VERSION: o manifesto (file_metadata) guarda a versão usada
+em cada arquivo e arquivos processados com uma versão antiga voltam a ser
+processados na próxima carga incremental.
+"""
+
+SCHEMA_VERSION = 3  # 2: tipos compactos (COMPACT_DTYPES); 3: linhas sem medições descartadas
+
+# ============================================================
+# LEITURA DO CSV BRUTO
+# ============================================================
+
+# Início da linha de cabeçalho nos CSVs do INMET (formatos atual e antigo)
+INMET_HEADER_MARKERS = (b'Data;', b'DATA;', b'DATA (YYYY-MM-DD);')
+
+# Bloco de metadados que antecede o cabeçalho nos arquivos do INMET ("CHAVE:;VALOR")
+INMET_METADATA_KEYS = {
+    'REGIAO': 'regiao',
+    'UF': 'uf',
+    'ESTACAO': 'estacao',
+    'CODIGO (WMO)': 'codigo_wmo',
+    'LATITUDE': 'latitude',
+    'LONGITUDE': 'longitude',
+    'ALTITUDE': 'altitude',
+    'DATA DE FUNDACAO': 'data_fundacao',
+}
+INMET_NUMERIC_METADATA = {'latitude', 'longitude', 'altitude'}
+
+# Colunas textuais dos CSVs do INMET; todas as demais são medições numéricas
+INMET_TEXT_COLUMNS = {
+    'Data', 'DATA', 'DATA (YYYY-MM-DD)', 'Hora UTC', 'HORA (UTC)',
+    'ingestion_date', 'source', 'original_filename'
+}
+
+# ============================================================
+# NORMALIZAÇÃO
+# ============================================================
+
+# Nomes originais -> nomes padronizados
+COLUMN_MAPPING = {
+    # INMET (cabeçalho real dos arquivos, sem acento em RADIACAO/PRESSAO)
+    'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)': 'temperatura',
+    'UMIDADE RELATIVA DO AR, HORARIA (%)': 'umidade_relativa',
+    'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB)': 'pressao_atmosferica',
+    'VENTO, DIREÇÃO HORARIA (gr) (° (gr))': 'direcao_vento',
+    'VENTO, VELOCIDADE HORARIA (m/s)': 'velocidade_vento',
+    'RADIACAO GLOBAL (Kj/m²)': 'radiacao_solar',
+    'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'precipitacao',
+
+    # INMET (variações com acento)
+    'PRESSÃO ATMOSFÉRICA AO NIVEL DA ESTAÇÃO, HORARIA (mB)': 'pressao_atmosferica',
+    'VENTO, DIREÇÃO HORARIA (gr)': 'direcao_vento',
+    'RADIAÇÃO GLOBAL (Kj/m²)': 'radiacao_solar',
+
+    'ESTACAO': 'estacao',
+    'UF': 'estado',
+    'NOME': 'cidade',
+
+    # Cabrobó 2020
+    'TempBulboSeco': 'temperatura',
+    'UmidadeRelativa': 'umidade_relativa',
+    'VelocidadeVento': 'velocidade_vento',
+    'RadiacaoGlobal': 'radiacao_solar',
+    'Precipitacao': 'precipitacao',
+}
+
+# Colunas de data -> formato; colunas de hora ("0000 UTC" ou "00:00")
+DATE_COLUMNS = {'Data': '%Y/%m/%d', 'DATA (YYYY-MM-DD)': '%Y-%m-%d', 'DATA': None}
+HOUR_COLUMNS = ('Hora UTC', 'HORA (UTC)')
+
+NUMERIC_COLUMNS = frozenset([
+    "temperatura", "umidade_relativa", "pressao_atmosferica",
+    "direcao_vento", "velocidade_vento", "radiacao_solar", "precipitacao"
+])
+
+# Faixas fisicamente plausíveis; valores fora delas viram NaN
+VALUE_LIMITS = {
+    'temperatura': (-50, 60),
+    'umidade_relativa': (0, 100),
+    'precipitacao': (0, 500),
+}
+
+# Colunas (e ordem) do DataFrame limpo
+RELEVANT_COLUMNS = [
+    "data_hora", "estacao", "cidade", "estado",
+    "temperatura", "umidade_relativa", "pressao_atmosferica",
+    "direcao_vento", "velocidade_vento", "radiacao_solar",
+    "precipitacao", "ano", "mes", "dia", "hora"
+]
+
+# Tipos do DataFrame final (o mesmo de weather_hourly): textos repetidos em
+# todas as linhas viram category, partes da data inteiros pequenos e medições
+# float32 (REAL no PostgreSQL), que sobra para a precisão dos sensores
+COMPACT_DTYPES = {
+    "estacao": "category",
+    "cidade": "category",
+    "estado": "category",
+    "arquivo_origem": "category",
+    "ano": "int16",
+    "mes": "int8",
+    "dia": "int8",
+    "hora": "int8",
+    **{col: "float32" for col in sorted(NUMERIC_COLUMNS)},
+}
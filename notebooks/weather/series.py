@@ -0,0 +1,310 @@
+"""
+Séries horárias por estação em uma grade regular (StationSeries)
+
+Os registros de várias estações são alinhados em matrizes NumPy
+(estação x hora) sobre uma grade horária contínua. O tempo é representado
+por inteiros int32 (horas desde 1970-01-01 UTC), sem montar DatetimeIndex
+por registro; as horas sem medição ficam como NaN e são expostas como
+máscara de lacunas. Reamostragem, janelas móveis e interpolação operam
+sobre as matrizes inteiras, sem groupby por estação.
+"""
+import numpy as np
+import pandas as pd
+
+# Frequências de resample: unidade do numpy (datetime64) das fronteiras
+_FREQ_UNITS = {"h": "h", "D": "D", "M": "M", "Y": "Y"}
+
+
+def hour_offsets(data_hora) -> np.ndarray:
+    """
+    Converte datas/horas em horas desde 1970-01-01 (int32), truncando
+    minutos e segundos; valores ausentes viram -1
+
+    Args:
+        data_hora: Série, índice ou array de datetime64
+    """
+    values = np.asarray(data_hora, dtype="datetime64[h]")
+    hours = values.astype(np.int64)
+    hours[np.isnat(values)] = -1
+    return hours.astype(np.int32)
+
+
+def offsets_to_datetime(hours: np.ndarray) -> np.ndarray:
+    """Converte horas desde 1970-01-01 em datetime64[h]"""
+    return np.asarray(hours, dtype=np.int64).astype("datetime64[h]")
+
+
+class StationSeries:
+    """
+    Medições de várias estações alinhadas em uma grade horária regular
+
+    Atributos:
+        stations: Nomes das estações (linhas das matrizes)
+        start: Hora inicial da grade (horas desde 1970-01-01, int32)
+        hours: Número de horas (colunas) da grade
+        values: Dicionário coluna -> matriz float32 (estações x horas), NaN
+            nas horas sem medição
+        observed: Matriz booleana (estações x horas) com as horas que
+            tinham registro
+    """
+
+    def __init__(self, stations: list, start: int, values: dict, observed: np.ndarray):
+        self.stations = list(stations)
+        self.start = np.int32(start)
+        self.values = values
+        self.observed = observed
+        self.hours = observed.shape[1]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: list = None, station_column: str = "estacao",
+                   start=None, end=None) -> "StationSeries":
+        """
+        Alinha um DataFrame no formato de weather_hourly (estacao,
+        data_hora, medições) na grade horária. Registros repetidos na mesma
+        estação e hora mantêm o último; a ordem das linhas não importa.
+
+        Args:
+            df: DataFrame com station_column, data_hora e as medições
+            columns: Medições incluídas (padrão: todas as colunas float)
+            station_column: Coluna que identifica a estação
+            start, end: Limites da grade (padrão: primeiro e último registro)
+        """
+        if columns is None:
+            columns = [col for col in df.columns if pd.api.types.is_float_dtype(df[col])]
+
+        offsets = hour_offsets(df["data_hora"])
+        codes, stations = pd.factorize(df[station_column], sort=True)
+        valid = (offsets >= 0) & (codes >= 0)
+
+        first = hour_offsets([pd.Timestamp(start)])[0] if start is not None else (
+            offsets[valid].min() if valid.any() else 0)
+        last = hour_offsets([pd.Timestamp(end)])[0] if end is not None else (
+            offsets[valid].max() if valid.any() else first - 1)
+        valid &= (offsets >= first) & (offsets <= last)
+
+        rows = codes[valid]
+        cols = offsets[valid] - first
+        shape = (len(stations), int(last - first + 1))
+
+        observed = np.zeros(shape, dtype=bool)
+        observed[rows, cols] = True
+        values = {}
+        for col in columns:
+            matrix = np.full(shape, np.nan, dtype=np.float32)
+            matrix[rows, cols] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)[valid]
+            values[col] = matrix
+        return cls(list(stations), first, values, observed)
+
+    # ============================================================
+    # Grade e lacunas
+    # ============================================================
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Horas da grade (horas desde 1970-01-01, int32)"""
+        return np.arange(self.start, self.start + self.hours, dtype=np.int32)
+
+    def timestamps(self) -> pd.DatetimeIndex:
+        """Datas/horas da grade (montadas só quando pedidas)"""
+        return pd.DatetimeIndex(offsets_to_datetime(self.offsets).astype("datetime64[ns]"))
+
+    def station(self, name: str) -> int:
+        """Linha das matrizes correspondente a uma estação"""
+        return self.stations.index(name)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[column]
+
+    def gap_mask(self, column: str = None) -> np.ndarray:
+        """
+        Máscara (estações x horas) das lacunas: horas sem registro ou, se
+        `column` for informada, sem valor nessa medição
+        """
+        if column is None:
+            return ~self.observed
+        return np.isnan(self.values[column])
+
+    def coverage(self, column: str = None) -> pd.Series:
+        """Fração das horas da grade com medição, por estação"""
+        present = ~self.gap_mask(column)
+        return pd.Series(present.mean(axis=1) if self.hours else 0.0, index=self.stations)
+
+    def gaps(self, column: str = None, min_hours: int = 1) -> pd.DataFrame:
+        """
+        Intervalos contínuos de lacunas por estação
+
+        Args:
+            column: Medição considerada (padrão: horas sem registro)
+            min_hours: Menor lacuna listada
+
+        Returns:
+            DataFrame com estacao, inicio, fim e horas
+        """
+        gap = self.gap_mask(column)
+        # Bordas das sequências de lacunas em cada linha (0 nas extremidades)
+        padded = np.zeros((gap.shape[0], gap.shape[1] + 2), dtype=np.int8)
+        padded[:, 1:-1] = gap
+        edges = np.diff(padded, axis=1)
+        row_start, col_start = np.nonzero(edges == 1)
+        _, col_end = np.nonzero(edges == -1)
+        lengths = col_end - col_start
+        keep = lengths >= min_hours
+
+        inicio = self.start + col_start[keep]
+        return pd.DataFrame({
+            "estacao": np.asarray(self.stations, dtype=object)[row_start[keep]],
+            "inicio": offsets_to_datetime(inicio).astype("datetime64[ns]"),
+            "fim": offsets_to_datetime(inicio + lengths[keep] - 1).astype("datetime64[ns]"),
+            "horas": lengths[keep],
+        })
+
+    # ============================================================
+    # Operações vetorizadas
+    # ============================================================
+
+    def resample(self, freq: str = "D", how: str = "mean", min_count: int = 1) -> tuple:
+        """
+        Agrega as horas em períodos de calendário para todas as estações de
+        uma vez (np.add.reduceat sobre as fronteiras dos períodos)
+
+        Args:
+            freq: 'h' (hora), 'D' (dia), 'M' (mês) ou 'Y' (ano)
+            how: 'mean', 'sum', 'min', 'max' ou 'count'
+            min_count: Mínimo de horas com medição no período; abaixo disso
+                o resultado é NaN
+
+        Returns:
+            Tupla (início de cada período como datetime64, dicionário
+            coluna -> matriz estações x períodos)
+        """
+        if freq not in _FREQ_UNITS:
+            raise ValueError(f"Frequência inválida: {freq}. Use uma das: {', '.join(_FREQ_UNITS)}")
+        if not self.hours:
+            empty = np.empty((len(self.stations), 0), dtype=np.float32)
+            return np.array([], dtype="datetime64[ns]"), {col: empty for col in self.values}
+        unit = _FREQ_UNITS[freq]
+        grid = offsets_to_datetime(np.array([self.start, self.start + self.hours - 1]))
+        periods = np.arange(grid[0].astype(f"datetime64[{unit}]"), grid[1].astype(f"datetime64[{unit}]") + 1)
+        # Índice na grade do início de cada período (o primeiro pode começar antes dela)
+        edges = np.maximum(
+            periods.astype("datetime64[h]").astype(np.int64) - int(self.start), 0
+        ).astype(np.intp)
+
+        result = {}
+        for col, matrix in self.values.items():
+            present = ~np.isnan(matrix)
+            counts = np.add.reduceat(present, edges, axis=1, dtype=np.int32)
+            if how == "count":
+                result[col] = counts
+                continue
+            if how in ("mean", "sum"):
+                agg = np.add.reduceat(np.where(present, matrix, 0), edges, axis=1, dtype=np.float64)
+                if how == "mean":
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        agg = agg / counts
+            elif how == "max":
+                agg = np.fmax.reduceat(matrix, edges, axis=1)
+            elif how == "min":
+                agg = np.fmin.reduceat(matrix, edges, axis=1)
+            else:
+                raise ValueError(f"Agregação inválida: {how}")
+            result[col] = np.where(counts >= max(min_count, 1), agg, np.nan).astype(np.float32)
+        return periods.astype("datetime64[ns]"), result
+
+    def rolling(self, column: str, window: int, how: str = "mean", min_periods: int = 1) -> np.ndarray:
+        """
+        Janela móvel de `window` horas (terminando na hora corrente) sobre a
+        grade, para todas as estações. Lacunas não contam como medição, então
+        a janela cobre sempre o mesmo intervalo de tempo.
+
+        Args:
+            column: Medição
+            window: Tamanho da janela em horas
+            how: 'mean', 'sum', 'min' ou 'max'
+            min_periods: Mínimo de horas com medição na janela
+
+        Returns:
+            Matriz float32 (estações x horas)
+        """
+        if isinstance(window, bool) or not isinstance(window, (int, np.integer)) or window < 1:
+            raise ValueError(f"Janela inválida: {window}. Use um número inteiro de horas >= 1")
+        matrix = self.values[column]
+        present = ~np.isnan(matrix)
+        # Somas acumuladas: soma/contagem de cada janela em O(horas)
+        counts = np.cumsum(present, axis=1, dtype=np.int32)
+        counts[:, window:] = counts[:, window:] - counts[:, :-window]
+
+        if how in ("mean", "sum"):
+            sums = np.cumsum(np.where(present, matrix, 0), axis=1, dtype=np.float64)
+            sums[:, window:] = sums[:, window:] - sums[:, :-window]
+            if how == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    sums = sums / counts
+            result = sums
+        elif how in ("min", "max"):
+            reduce = np.fmax if how == "max" else np.fmin
+            padded = np.concatenate(
+                [np.full((matrix.shape[0], window - 1), np.nan, dtype=matrix.dtype), matrix], axis=1
+            )
+            windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)
+            result = reduce.reduce(windows, axis=2)
+        else:
+            raise ValueError(f"Agregação inválida: {how}")
+        return np.where(counts >= max(min_periods, 1), result, np.nan).astype(np.float32)
+
+    def interpolate(self, column: str, max_gap: int = 3) -> np.ndarray:
+        """
+        Interpolação linear das lacunas de até `max_gap` horas entre duas
+        medições, para todas as estações de uma vez. Lacunas maiores e as
+        das extremidades continuam NaN (ver gap_mask).
+
+        Returns:
+            Matriz float32 (estações x horas)
+        """
+        if isinstance(max_gap, bool) or not isinstance(max_gap, (int, np.integer)) or max_gap < 0:
+            raise ValueError(f"Lacuna máxima inválida: {max_gap}. Use um número inteiro de horas >= 0")
+        matrix = self.values[column]
+        present = ~np.isnan(matrix)
+        index = np.arange(matrix.shape[1])
+
+        # Última medição antes e primeira depois de cada hora
+        previous = np.maximum.accumulate(np.where(present, index, -1), axis=1)
+        following = np.minimum.accumulate(
+            np.where(present, index, matrix.shape[1])[:, ::-1], axis=1
+        )[:, ::-1]
+
+        fill = ~present & (previous >= 0) & (following < matrix.shape[1])
+        fill &= (following - previous - 1) <= max_gap
+        rows, cols = np.nonzero(fill)
+        before = previous[rows, cols]
+        after = following[rows, cols]
+        weight = (cols - before) / (after - before)
+
+        result = matrix.copy()
+        result[rows, cols] = matrix[rows, before] + weight * (matrix[rows, after] - matrix[rows, before])
+        return result
+
+    # ============================================================
+    # Conversão
+    # ============================================================
+
+    def to_frame(self, dropna: bool = True) -> pd.DataFrame:
+        """
+        DataFrame longo (estacao, data_hora, medições). Com dropna, só as
+        horas com registro
+        """
+        rows, cols = np.nonzero(self.observed) if dropna else np.indices(self.observed.shape).reshape(2, -1)
+        frame = {
+            "estacao": pd.Categorical.from_codes(rows, self.stations),
+            "data_hora": offsets_to_datetime(self.start + cols).astype("datetime64[ns]"),
+        }
+        for col, matrix in self.values.items():
+            frame[col] = matrix[rows, cols]
+        return pd.DataFrame(frame)
+
+    def __repr__(self) -> str:
+        if not self.hours:
+            return f"StationSeries({len(self.stations)} estações, grade vazia)"
+        first, last = offsets_to_datetime(np.array([self.start, self.start + self.hours - 1]))
+        return (f"StationSeries({len(self.stations)} estações, {self.hours} horas "
+                f"de {first} a {last}, colunas: {', '.join(self.values)})")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do clean_weather_data: implementação antiga (texto, várias
+passadas por coluna) x implementação vetorizada com esquema pré-compilado
+
+Usa os CSVs locais de data/dados_20XX já lidos com parse_inmet_csv, confere
+que as duas implementações produzem as mesmas linhas e datas e mede
+registros/s apenas da etapa de limpeza.
+
+    python scripts/benchmark_limpeza.py --files 20 --repeat 3
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "notebooks"))
+
+from weather import parse_inmet_csv, clean_weather_data, NUMERIC_COLUMNS, RELEVANT_COLUMNS
+
+DATA_DIR = ROOT_DIR / "data"
+
+
+def clean_weather_data_legacy(df: pd.DataFrame) -> pd.DataFrame:
+    """Versão anterior do clean_weather_data, mantida só como referência"""
+    df = df.copy()
+
+    column_mapping = {
+        'TEMPERATURA DO AR - BULBO SECO, HORARIA (°C)': 'temperatura',
+        'UMIDADE RELATIVA DO AR, HORARIA (%)': 'umidade_relativa',
+        'VENTO, VELOCIDADE HORARIA (m/s)': 'velocidade_vento',
+        'RADIAÇÃO GLOBAL (Kj/m²)': 'radiacao_solar',
+        'PRECIPITAÇÃO TOTAL, HORÁRIO (mm)': 'precipitacao',
+        'ESTACAO': 'estacao',
+        'UF': 'estado',
+        'NOME': 'cidade',
+    }
+    df = df.rename(columns=column_mapping)
+
+    if "data_hora" in df.columns:
+        df["data_hora"] = pd.to_datetime(df["data_hora"], errors="coerce")
+    elif "Data" in df.columns and "Hora UTC" in df.columns:
+        df["Hora UTC"] = (
+            df["Hora UTC"]
+            .astype(str)
+            .str.replace(" UTC", "", regex=False)
+            .str.zfill(4)
+        )
+        df["data_hora"] = pd.to_datetime(
+            df["Data"].astype(str) + " " + df["Hora UTC"].astype(str),
+            format="%Y/%m/%d %H%M",
+            errors="coerce"
+        )
+    elif "Data" in df.columns:
+        df["data_hora"] = pd.to_datetime(df["Data"], errors="coerce")
+    elif "DATA" in df.columns:
+        df["data_hora"] = pd.to_datetime(df["DATA"], errors="coerce")
+    else:
+        raise ValueError("Nenhuma coluna de data encontrada no arquivo!")
+
+    df = df.dropna(subset=["data_hora"])
+
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = (
+                df[col]
+                .astype(str)
+                .str.strip()
+                .str.replace(" ", "")
+                .str.replace(",", ".", regex=False)
+            )
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    df["ano"] = df["data_hora"].dt.year
+    df["mes"] = df["data_hora"].dt.month
+    df["dia"] = df["data_hora"].dt.day
+    df["hora"] = df["data_hora"].dt.hour
+
+    existing_cols = [c for c in RELEVANT_COLUMNS if c in df.columns]
+    return df[existing_cols]
+
+
+def measure(label: str, clean, frames: list, repeat: int) -> float:
+    rows = sum(len(df) for df in frames) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for df in frames:
+            clean(df)
+    elapsed = time.perf_counter() - start
+
+    rate = rows / elapsed if elapsed else float("inf")
+    print(f"{label:12s} {rows:>9,} registros em {elapsed:8.2f}s -> {rate:>12,.0f} registros/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=20, help="Quantidade de arquivos CSV usados (padrão: 20)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições da medição (padrão: 3)")
+    args = parser.parse_args()
+
+    print("=== Benchmark do clean_weather_data ===\n")
+    csv_files = sorted(DATA_DIR.glob("dados_*/*.CSV"))[:args.files]
+    frames = [parse_inmet_csv(path.read_bytes()) for path in csv_files]
+    print(f"{len(frames)} arquivos lidos, {sum(len(df) for df in frames):,} registros\n")
+
+    # A versão atual mapeia mais colunas (pressão, direção do vento...), então
+    # a comparação é feita nas linhas e em data_hora
+    for df in frames:
+        pd.testing.assert_series_equal(
+            clean_weather_data_legacy(df)["data_hora"].reset_index(drop=True),
+            clean_weather_data(df)["data_hora"].reset_index(drop=True)
+        )
+    print("Mesmas linhas e datas nas duas implementações\n")
+
+    rate_legacy = measure("antiga", clean_weather_data_legacy, frames, args.repeat)
+    rate_new = measure("vetorizada", clean_weather_data, frames, args.repeat)
+
+    print(f"\nA limpeza vetorizada foi {rate_new / rate_legacy:.1f}x mais rápida")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark da carga de weather_hourly no PostgreSQL: DataFrame.to_sql
+(write_to_postgres) x COPY FROM STDIN com staging + merge (copy_to_postgres)
+
+Usa os CSVs locais de data/dados_20XX, limpos com normalize_inmet_file e
+convertidos com prepare_weather_hourly (que registra as estações em
+stations), e carrega cada caminho em uma tabela temporária de benchmark com a mesma
+estrutura de weather_hourly (removida ao final).
+
+Execute no JupyterLab (ou com as variáveis POSTGRES_* apontando para o banco):
+    python scripts/benchmark_postgres_load.py --files 10
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "notebooks"))
+
+from sqlalchemy import text
+from utils import engine, write_to_postgres, copy_to_postgres, prepare_weather_hourly, WEATHER_HOURLY_KEY
+from weather import normalize_inmet_file
+
+DATA_DIR = ROOT_DIR / "data"
+
+
+def load_frames(max_files: int) -> list:
+    """Lê e limpa os CSVs locais, como o process_raw_files faria"""
+    frames = []
+    csv_files = sorted(DATA_DIR.glob("dados_*/*.CSV"))[:max_files]
+    for csv_path in csv_files:
+        df_clean = normalize_inmet_file(csv_path.read_bytes(), csv_path.name)
+        frames.append(prepare_weather_hourly(df_clean))
+    return frames
+
+
+def run(label: str, table: str, frames: list, load) -> float:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"CREATE TABLE {table} (LIKE weather_hourly INCLUDING ALL)"))
+
+    rows = sum(len(df) for df in frames)
+    try:
+        start = time.perf_counter()
+        for df in frames:
+            load(df, table)
+        elapsed = time.perf_counter() - start
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+    rate = rows / elapsed if elapsed else float("inf")
+    print(f"{label:10s} {rows:>9,} registros em {elapsed:8.2f}s -> {rate:>12,.0f} registros/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=10, help="Quantidade de arquivos CSV usados (padrão: 10)")
+    args = parser.parse_args()
+
+    print("=== Benchmark de carga no PostgreSQL ===\n")
+    frames = load_frames(args.files)
+    print(f"{len(frames)} arquivos limpos, {sum(len(df) for df in frames):,} registros\n")
+
+    rate_to_sql = run(
+        "to_sql", "bench_weather_hourly_to_sql", frames,
+        lambda df, table: write_to_postgres(df, table, if_exists="append")
+    )
+    rate_copy = run(
+        "COPY", "bench_weather_hourly_copy", frames,
+        lambda df, table: copy_to_postgres(df, table, key_columns=WEATHER_HOURLY_KEY)
+    )
+
+    print(f"\nCOPY foi {rate_copy / rate_to_sql:.1f}x mais rápido que to_sql")
+
+
+if __name__ == "__main__":
+    main()
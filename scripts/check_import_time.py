@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Verificação de regressão do tempo de importação de notebooks/utils.py
+
+Importa os módulos em um processo novo com `python -X importtime`, mostra as
+importações mais caras e falha (código de saída 1) se alguma dependência
+pesada for carregada na importação ou se o tempo total passar do limite.
+
+    python scripts/check_import_time.py --max-ms 200
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+NOTEBOOKS_DIR = ROOT_DIR / "notebooks"
+
+# Módulos verificados e dependências que só devem carregar no primeiro uso
+MODULES = ["utils", "weather"]
+HEAVY_MODULES = ["pandas", "numpy", "sqlalchemy", "boto3", "botocore", "mlflow", "pyarrow"]
+
+
+def import_times(module: str) -> dict:
+    """
+    Importa `module` em um processo novo e retorna
+    {módulo importado: tempo cumulativo em microssegundos}, considerando só
+    as importações feitas por `module` (e não as da inicialização do Python)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=NOTEBOOKS_DIR, capture_output=True, text=True, check=True
+    )
+    # Cada importação aparece depois das suas dependências; as de nível zero
+    # (sem indentação) delimitam as subárvores
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+        if name == f" {module}":
+            return times
+        if not name.startswith("  "):
+            times = {}
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-ms", type=float, default=200,
+                        help="Tempo máximo de importação por módulo em ms (padrão: 200)")
+    parser.add_argument("--top", type=int, default=5, help="Importações mais caras exibidas")
+    args = parser.parse_args()
+
+    failures = []
+    for module in MODULES:
+        times = import_times(module)
+        total_ms = times.get(module, 0) / 1000
+        print(f"=== import {module}: {total_ms:.1f} ms ===")
+        for name, micros in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"   {micros / 1000:8.1f} ms  {name}")
+
+        heavy = [name for name in HEAVY_MODULES if name in times]
+        if heavy:
+            failures.append(f"{module} importa dependências pesadas: {', '.join(heavy)}")
+        if total_ms > args.max_ms:
+            failures.append(f"{module} levou {total_ms:.1f} ms (limite: {args.max_ms:.0f} ms)")
+        print()
+
+    if failures:
+        for failure in failures:
+            print(f"FALHA: {failure}")
+        sys.exit(1)
+    print("OK: importações leves e dentro do limite")
+
+
+if __name__ == "__main__":
+    main()
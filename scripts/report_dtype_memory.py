@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Relatório de bytes por registro dos DataFrames de weather_hourly antes e
+depois da compactação de tipos (COMPACT_DTYPES em notebooks/weather/schema.py)
+
+Usa os CSVs locais de data/dados_20XX, mede a memória (deep=True) por coluna
+nos tipos originais (object/int64/float64) e nos tipos compactos e,
+opcionalmente, o tamanho médio dos registros já gravados no PostgreSQL.
+
+    python scripts/report_dtype_memory.py --files 20
+    python scripts/report_dtype_memory.py --postgres
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "notebooks"))
+
+from weather import parse_inmet_csv, clean_weather_data, compact_dtypes, station_from_filename
+
+DATA_DIR = ROOT_DIR / "data"
+
+
+def load_frames(files: int) -> list:
+    """Lê e limpa os CSVs locais sem compactar (tipos originais)"""
+    frames = []
+    for path in sorted(DATA_DIR.glob("dados_*/*.CSV"))[:files]:
+        df = clean_weather_data(parse_inmet_csv(path.read_bytes()))
+        df["arquivo_origem"] = path.name
+        if "estacao" not in df.columns:
+            df["estacao"] = station_from_filename(path.name)
+        frames.append(df)
+    return frames
+
+
+def report_frames(frames: list):
+    rows = sum(len(df) for df in frames)
+    before = {}
+    after = {}
+    for df in frames:
+        for col, size in df.memory_usage(deep=True, index=False).items():
+            before[col] = before.get(col, 0) + size
+        for col, size in compact_dtypes(df.copy()).memory_usage(deep=True, index=False).items():
+            after[col] = after.get(col, 0) + size
+
+    dtypes_before = frames[0].dtypes
+    dtypes_after = compact_dtypes(frames[0].copy()).dtypes
+    print(f"{len(frames)} arquivos, {rows:,} registros\n")
+    print(f"{'coluna':22s} {'antes':>14s} {'depois':>14s}  bytes/registro")
+    for col in before:
+        print(f"{col:22s} {str(dtypes_before[col]):>14s} {str(dtypes_after[col]):>14s}  "
+              f"{before[col] / rows:6.1f} -> {after[col] / rows:6.1f}")
+
+    total_before = sum(before.values()) / rows
+    total_after = sum(after.values()) / rows
+    print(f"\n{'total':52s}  {total_before:6.1f} -> {total_after:6.1f} "
+          f"({total_before / total_after:.1f}x menor)")
+
+
+def report_postgres():
+    from utils import get_engine, text
+
+    query = text("""
+        SELECT COUNT(*) AS registros,
+               AVG(pg_column_size(t.*)) AS bytes_registro,
+               -- weather_hourly é particionada: soma as partições
+               (SELECT SUM(pg_relation_size(relid)) FROM pg_partition_tree('weather_hourly')) AS tabela,
+               (SELECT SUM(pg_indexes_size(relid)) FROM pg_partition_tree('weather_hourly')) AS indices
+        FROM weather_hourly t
+    """)
+    with get_engine().connect() as conn:
+        row = conn.execute(query).mappings().one()
+
+    print("\n=== PostgreSQL (weather_hourly) ===")
+    if not row['registros']:
+        print("Tabela vazia")
+        return
+    print(f"Registros:          {row['registros']:,}")
+    print(f"Bytes por registro: {float(row['bytes_registro']):.1f} (dados da linha)")
+    print(f"Tabela:             {row['tabela'] / row['registros']:.1f} bytes/registro no disco")
+    print(f"Índices:            {row['indices'] / row['registros']:.1f} bytes/registro no disco")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=20, help="Quantidade de arquivos CSV usados (padrão: 20)")
+    parser.add_argument("--postgres", action="store_true",
+                        help="Mede também os registros gravados em weather_hourly")
+    args = parser.parse_args()
+
+    print("=== Memória dos DataFrames de weather_hourly ===\n")
+    report_frames(load_frames(args.files))
+    if args.postgres:
+        report_postgres()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Relatório da compressão dos CSVs brutos do INMET (RAW_COMPRESSION)
+
+Comprime os CSVs locais de data/dados_20XX com cada codec de
+weather.compression e mostra o tamanho total, a razão de compressão e a
+vazão de compressão/descompressão. zstd só é medido se o pacote
+`zstandard` estiver instalado.
+
+    python scripts/report_raw_compression.py
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "notebooks"))
+
+from weather.compression import ENCODINGS, compress_bytes, decompress_bytes
+
+DATA_DIR = ROOT_DIR / "data"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=None, help="Quantidade de arquivos CSV usados (padrão: todos)")
+    args = parser.parse_args()
+
+    contents = [path.read_bytes() for path in sorted(DATA_DIR.glob("dados_*/*.CSV"))[:args.files]]
+    raw_mb = sum(len(data) for data in contents) / 1024 / 1024
+    print(f"=== Compressão dos CSVs brutos ({len(contents)} arquivos, {raw_mb:.1f} MB) ===\n")
+    print(f"{'codec':6s} {'MB':>8s} {'razão':>7s} {'comprime':>12s} {'descomprime':>12s}")
+
+    for encoding in ENCODINGS:
+        try:
+            start = time.perf_counter()
+            compressed = [compress_bytes(data, encoding) for data in contents]
+            compress_s = time.perf_counter() - start
+        except ImportError as e:
+            print(f"{encoding:6s} indisponível: {e}")
+            continue
+
+        start = time.perf_counter()
+        for data, original in zip(compressed, contents):
+            assert decompress_bytes(data, encoding) == original
+        decompress_s = time.perf_counter() - start
+
+        mb = sum(len(data) for data in compressed) / 1024 / 1024
+        print(f"{encoding:6s} {mb:8.1f} {raw_mb / mb:6.1f}x {raw_mb / compress_s:8.0f} MB/s "
+              f"{raw_mb / decompress_s:8.0f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,263 @@
 #!/usr/bin/env python3
 """
 Script para fazer upload de todos os arquivos CSV para o MinIO via FastAPI
+
+Os arquivos são enviados em paralelo (uma sessão HTTP keep-alive por
+thread), com novas tentativas e espera exponencial em falhas de rede ou
+erros 5xx/429. O progresso fica em um arquivo de estado local: rodar o script
+de novo envia só os arquivos que faltaram ou mudaram.
+
+    python scripts/upload_data.py --workers 4
+    python scripts/upload_data.py --force        # reenvia tudo
 """
+import argparse
+import json
 import os
+import random
 import sys
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
-from tqdm import tqdm
 
-API_URL = "http://localhost:8000"
+import requests
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+API_URL = os.getenv("API_URL", "http://localhost:8000")
 DATA_DIR = Path("data")
+STATE_FILE = Path(".upload_state.json")
+
+# Paralelismo e novas tentativas
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_RETRIES = 3
+UPLOAD_TIMEOUT = 120
+RETRY_STATUS = {429, 500, 502, 503, 504}
 
-def check_api():
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """Sessão HTTP da thread atual, reaproveitando a conexão entre arquivos"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+
+def check_api(api_url: str = API_URL) -> bool:
     """Verifica se a API está respondendo"""
     try:
-        response = requests.get(f"{API_URL}/health", timeout=5)
+        response = requests.get(f"{api_url}/health", timeout=5)
         return response.status_code == 200
-    except:
+    except requests.RequestException:
         return False
 
-def upload_file(file_path):
-    """Faz upload de um arquivo"""
+
+def find_csv_files(data_dir: Path = DATA_DIR) -> list:
+    """Arquivos CSV de data/dados_*/, em ordem"""
+    csv_files = []
+    for year_dir in sorted(data_dir.glob("dados_*")):
+        csv_files.extend(sorted(year_dir.glob("*.CSV")) + sorted(year_dir.glob("*.csv")))
+    return csv_files
+
+
+def load_state(state_file: Path) -> dict:
+    """Arquivos já enviados: caminho -> {'size', 'mtime', 'filename', 'uploaded_at'}"""
     try:
-        with open(file_path, 'rb') as f:
-            files = {'file': (file_path.name, f, 'text/csv')}
-            response = requests.post(f"{API_URL}/upload", files=files, timeout=60)
-            return response.json()
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+        return json.loads(state_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        print(f"Aviso: arquivo de estado {state_file} inválido, ignorando")
+        return {}
+
+
+def save_state(state_file: Path, state: dict):
+    """Grava o estado em arquivo temporário e renomeia (nunca fica pela metade)"""
+    tmp_path = state_file.with_name(state_file.name + ".tmp")
+    tmp_path.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, state_file)
+
+
+def file_fingerprint(file_path: Path) -> dict:
+    stat = file_path.stat()
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def upload_file(file_path: Path, api_url: str = API_URL, retries: int = UPLOAD_RETRIES,
+                timeout: float = UPLOAD_TIMEOUT) -> dict:
+    """
+    Faz upload de um arquivo, tentando de novo (espera 1s, 2s, 4s... com
+    variação aleatória) em falhas de conexão, timeout e respostas 5xx/429
+
+    Returns:
+        Resposta da API, ou {'status': 'error', 'message'}; inclui 'attempts'
+    """
+    for attempt in range(1, retries + 2):
+        try:
+            with open(file_path, "rb") as f:
+                files = {"file": (file_path.name, f, "text/csv")}
+                response = get_session().post(f"{api_url}/upload", files=files, timeout=timeout)
+            if response.status_code < 400:
+                return {**response.json(), "attempts": attempt}
+            try:
+                message = response.json().get("detail", response.text)
+            except ValueError:
+                message = response.text
+            result = {"status": "error", "message": f"HTTP {response.status_code}: {message}"}
+            if response.status_code not in RETRY_STATUS:
+                return {**result, "attempts": attempt}
+        except (requests.ConnectionError, requests.Timeout) as e:
+            result = {"status": "error", "message": str(e)}
+            # A conexão pode ter ficado inválida: a próxima tentativa abre outra
+            get_session().close()
+        except Exception as e:
+            return {"status": "error", "message": str(e), "attempts": attempt}
+
+        if attempt <= retries:
+            time.sleep(2 ** (attempt - 1) + random.uniform(0, 0.5))
+    return {**result, "attempts": attempt}
+
+
+def upload_files(csv_files: list, api_url: str = API_URL, workers: int = UPLOAD_WORKERS,
+                 retries: int = UPLOAD_RETRIES, timeout: float = UPLOAD_TIMEOUT,
+                 state_file: Path = STATE_FILE, force: bool = False, on_result=None) -> dict:
+    """
+    Envia os arquivos em paralelo, pulando os que o arquivo de estado registra
+    como já enviados (mesmo tamanho e data de modificação)
+
+    Args:
+        csv_files: Caminhos dos arquivos
+        api_url: URL da API
+        workers: Uploads simultâneos
+        retries: Novas tentativas por arquivo
+        timeout: Timeout de cada requisição em segundos
+        state_file: Arquivo de estado (None = não registra progresso)
+        force: Reenvia mesmo os arquivos já registrados
+        on_result: Função chamada a cada arquivo concluído com (caminho, resultado)
+
+    Returns:
+        Resumo com 'success', 'errors', 'skipped', 'bytes', 'elapsed' e
+        'failed' (lista de (caminho, mensagem))
+    """
+    state = load_state(state_file) if state_file else {}
+    pending = []
+    skipped = 0
+    for file_path in csv_files:
+        entry = state.get(str(file_path))
+        if not force and entry and {k: entry.get(k) for k in ("size", "mtime")} == file_fingerprint(file_path):
+            skipped += 1
+        else:
+            pending.append(file_path)
+
+    summary = {"success": 0, "errors": 0, "skipped": skipped, "bytes": 0, "elapsed": 0.0, "failed": []}
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(upload_file, file_path, api_url, retries, timeout): file_path
+            for file_path in pending
+        }
+        for future in as_completed(futures):
+            file_path = futures[future]
+            result = future.result()
+            with lock:
+                if result.get("status") == "success":
+                    summary["success"] += 1
+                    summary["bytes"] += file_path.stat().st_size
+                    if state_file:
+                        state[str(file_path)] = {
+                            **file_fingerprint(file_path),
+                            "filename": result.get("filename"),
+                            "uploaded_at": datetime.now().isoformat(timespec="seconds"),
+                        }
+                        save_state(state_file, state)
+                else:
+                    summary["errors"] += 1
+                    summary["failed"].append((file_path, result.get("message", "Erro desconhecido")))
+            if on_result:
+                on_result(file_path, result)
+
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+
+def print_summary(summary: dict, total: int):
+    elapsed = summary["elapsed"]
+    mb = summary["bytes"] / 1024 / 1024
+    print(f"\n=== Upload concluído ===")
+    print(f"Sucesso: {summary['success']}")
+    print(f"Erros: {summary['errors']}")
+    print(f"Já enviados (pulados): {summary['skipped']}")
+    print(f"Total: {total}")
+    if elapsed > 0 and summary["success"]:
+        print(f"Vazão: {mb:.1f} MB em {elapsed:.1f}s -> {mb / elapsed:.2f} MB/s, "
+              f"{summary['success'] / elapsed:.2f} arquivos/s")
+    for file_path, message in summary["failed"]:
+        print(f"  Erro em {file_path.name}: {message}")
+
+
+def parse_args(description: str):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--api-url", default=API_URL, help=f"URL da API (padrão: {API_URL})")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="Pasta com dados_*/ (padrão: data)")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS,
+                        help=f"Uploads simultâneos (padrão: {UPLOAD_WORKERS})")
+    parser.add_argument("--retries", type=int, default=UPLOAD_RETRIES,
+                        help=f"Novas tentativas por arquivo (padrão: {UPLOAD_RETRIES})")
+    parser.add_argument("--timeout", type=float, default=UPLOAD_TIMEOUT,
+                        help=f"Timeout por requisição em segundos (padrão: {UPLOAD_TIMEOUT})")
+    parser.add_argument("--state-file", type=Path, default=STATE_FILE,
+                        help=f"Arquivo de progresso (padrão: {STATE_FILE})")
+    parser.add_argument("--force", action="store_true", help="Reenvia todos os arquivos")
+    return parser.parse_args()
+
 
 def main():
+    args = parse_args(__doc__.splitlines()[1])
     print("=== Upload de Dados Meteorológicos ===\n")
-    
+
     # Verificar API
-    if not check_api():
-        print(f"Erro: API nao esta respondendo em {API_URL}")
+    if not check_api(args.api_url):
+        print(f"Erro: API nao esta respondendo em {args.api_url}")
         print("   Certifique-se de que o FastAPI esta rodando (docker-compose up)")
         sys.exit(1)
-    
+
     print("API esta respondendo\n")
-    
+
     # Encontrar todos os arquivos CSV
-    csv_files = []
-    for year_dir in sorted(DATA_DIR.glob("dados_*")):
-        for csv_file in sorted(year_dir.glob("*.CSV")) + sorted(year_dir.glob("*.csv")):
-            csv_files.append(csv_file)
-    
+    csv_files = find_csv_files(args.data_dir)
     if not csv_files:
-        print("Nenhum arquivo CSV encontrado em data/dados_*/")
+        print(f"Nenhum arquivo CSV encontrado em {args.data_dir}/dados_*/")
+        sys.exit(1)
+
+    print(f"Encontrados {len(csv_files)} arquivos CSV ({args.workers} uploads simultâneos)\n")
+
+    progress = tqdm(total=len(csv_files), desc="Enviando arquivos") if tqdm else None
+
+    def on_result(file_path, result):
+        if progress:
+            progress.update(1)
+        if result.get("status") != "success":
+            print(f"\nErro ao enviar {file_path.name}: {result.get('message', 'Erro desconhecido')}")
+
+    summary = upload_files(
+        csv_files, args.api_url, args.workers, args.retries, args.timeout,
+        args.state_file, args.force, on_result
+    )
+    if progress:
+        progress.update(summary["skipped"])
+        progress.close()
+    print_summary(summary, len(csv_files))
+    if summary["errors"]:
         sys.exit(1)
-    
-    print(f"Encontrados {len(csv_files)} arquivos CSV\n")
-    
-    # Fazer upload
-    success_count = 0
-    error_count = 0
-    
-    for csv_file in tqdm(csv_files, desc="Enviando arquivos"):
-        result = upload_file(csv_file)
-        
-        if result.get("status") == "success":
-            success_count += 1
-        else:
-            error_count += 1
-            print(f"\nErro ao enviar {csv_file.name}: {result.get('message', 'Erro desconhecido')}")
-    
-    print(f"\n=== Upload concluído ===")
-    print(f"Sucesso: {success_count}")
-    print(f"Erros: {error_count}")
-    print(f"Total: {len(csv_files)}")
 
 if __name__ == "__main__":
     main()
-
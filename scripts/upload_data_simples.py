@@ -1,81 +1,56 @@
 #!/usr/bin/env python3
 """
 Script simplificado para fazer upload de todos os arquivos CSV para o MinIO via FastAPI
-Versão sem dependências extras (sem tqdm)
+Versão sem dependências extras (sem tqdm); usa o mesmo envio paralelo com
+novas tentativas e arquivo de estado de upload_data.py
 """
-import os
 import sys
-import requests
 from pathlib import Path
 
-API_URL = "http://localhost:8000"
-DATA_DIR = Path("data")
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-def check_api():
-    """Verifica se a API está respondendo"""
-    try:
-        response = requests.get(f"{API_URL}/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
-
-def upload_file(file_path):
-    """Faz upload de um arquivo"""
-    try:
-        with open(file_path, 'rb') as f:
-            files = {'file': (file_path.name, f, 'text/csv')}
-            response = requests.post(f"{API_URL}/upload", files=files, timeout=60)
-            return response.json()
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+from upload_data import check_api, find_csv_files, upload_files, print_summary, parse_args
 
 def main():
+    args = parse_args(__doc__.splitlines()[1])
     print("=== Upload de Dados Meteorológicos ===\n")
-    
+
     # Verificar API
-    if not check_api():
-        print(f"Erro: API nao esta respondendo em {API_URL}")
+    if not check_api(args.api_url):
+        print(f"Erro: API nao esta respondendo em {args.api_url}")
         print("   Certifique-se de que o FastAPI esta rodando (docker-compose up)")
         sys.exit(1)
-    
+
     print("API esta respondendo\n")
-    
+
     # Encontrar todos os arquivos CSV
-    csv_files = []
-    for year_dir in sorted(DATA_DIR.glob("dados_*")):
-        for csv_file in sorted(year_dir.glob("*.CSV")) + sorted(year_dir.glob("*.csv")):
-            csv_files.append(csv_file)
-    
+    csv_files = find_csv_files(args.data_dir)
     if not csv_files:
-        print("Nenhum arquivo CSV encontrado em data/dados_*/")
+        print(f"Nenhum arquivo CSV encontrado em {args.data_dir}/dados_*/")
         sys.exit(1)
-    
+
     print(f"Encontrados {len(csv_files)} arquivos CSV\n")
-    
+
     # Fazer upload
-    success_count = 0
-    error_count = 0
-    
-    for i, csv_file in enumerate(csv_files, 1):
-        print(f"[{i}/{len(csv_files)}] Enviando {csv_file.name}...", end=" ")
-        result = upload_file(csv_file)
-        
+    done = 0
+
+    def on_result(file_path, result):
+        nonlocal done
+        done += 1
         if result.get("status") == "success":
-            success_count += 1
-            print("Sucesso")
+            print(f"[{done}/{len(csv_files)}] {file_path.name}: Sucesso")
         else:
-            error_count += 1
-            print(f"Erro: {result.get('message', 'Erro desconhecido')}")
-    
-    print(f"\n=== Upload concluido ===")
-    print(f"Sucesso: {success_count}")
-    print(f"Erros: {error_count}")
-    print(f"Total: {len(csv_files)}")
-    
-    if success_count > 0:
-        print(f"\n{success_count} arquivo(s) enviado(s) com sucesso!")
+            print(f"[{done}/{len(csv_files)}] {file_path.name}: Erro: {result.get('message', 'Erro desconhecido')}")
+
+    summary = upload_files(
+        csv_files, args.api_url, args.workers, args.retries, args.timeout,
+        args.state_file, args.force, on_result
+    )
+    print_summary(summary, len(csv_files))
+
+    if summary["success"] > 0:
+        print(f"\n{summary['success']} arquivo(s) enviado(s) com sucesso!")
         print("   Verifique no MinIO: http://localhost:9091 (bucket raw/)")
 
 if __name__ == "__main__":
     main()
-
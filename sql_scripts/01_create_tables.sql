@@ -1,35 +1,94 @@
 -- Script de criação das tabelas para armazenar dados meteorológicos
 -- Banco: weather_db
 
--- Tabela principal de dados meteorológicos horários
+-- Dimensão de estações, preenchida com o bloco de metadados dos CSVs do INMET
+-- (estacao é o identificador usado nos nomes dos arquivos e nos agregados)
+CREATE TABLE IF NOT EXISTS stations (
+    station_id SMALLSERIAL PRIMARY KEY,
+    estacao VARCHAR(50) UNIQUE NOT NULL,
+    codigo_wmo VARCHAR(10) UNIQUE,
+    nome VARCHAR(100),
+    uf CHAR(2),
+    regiao VARCHAR(5),
+    latitude REAL,
+    longitude REAL,
+    altitude REAL,
+    data_fundacao DATE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Tabela principal de dados meteorológicos horários, particionada por ano
+-- (data_hora): consultas por período só leem as partições do intervalo
 CREATE TABLE IF NOT EXISTS weather_hourly (
-    id SERIAL PRIMARY KEY,
+    station_id SMALLINT NOT NULL REFERENCES stations(station_id),
     data_hora TIMESTAMP NOT NULL,
-    estacao VARCHAR(50),
-    cidade VARCHAR(100),
-    estado VARCHAR(2),
-    temperatura DECIMAL(5,2),
-    umidade_relativa DECIMAL(5,2),
-    pressao_atmosferica DECIMAL(7,2),
-    direcao_vento DECIMAL(5,2),
-    velocidade_vento DECIMAL(5,2),
-    radiacao_solar DECIMAL(8,2),
-    precipitacao DECIMAL(6,2),
-    ano INTEGER,
-    mes INTEGER,
-    dia INTEGER,
-    hora INTEGER,
+    temperatura REAL,
+    umidade_relativa REAL,
+    pressao_atmosferica REAL,
+    direcao_vento REAL,
+    velocidade_vento REAL,
+    radiacao_solar REAL,
+    precipitacao REAL,
+    ano SMALLINT,
+    mes SMALLINT,
+    dia SMALLINT,
+    hora SMALLINT,
     arquivo_origem VARCHAR(255),
     ingestion_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (station_id, data_hora)
+) PARTITION BY RANGE (data_hora);
+
+-- Cria (se ainda não existir) a partição de um ano; chamada pela carga
+-- (ensure_weather_hourly_partitions em notebooks/utils.py) antes de inserir
+CREATE OR REPLACE FUNCTION create_weather_hourly_partition(p_ano INTEGER) RETURNS VOID AS $$
+BEGIN
+    -- Serializa cargas concorrentes criando a mesma partição
+    PERFORM pg_advisory_xact_lock(hashtext('weather_hourly_partition'));
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF weather_hourly FOR VALUES FROM (%L) TO (%L)',
+        'weather_hourly_' || p_ano, make_date(p_ano, 1, 1), make_date(p_ano + 1, 1, 1)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_weather_hourly_partition(ano) FROM generate_series(2020, 2026) AS ano;
 
--- Índices para melhor performance
+-- Registros fora das partições anuais (não deve receber dados na carga normal)
+CREATE TABLE IF NOT EXISTS weather_hourly_default PARTITION OF weather_hourly DEFAULT;
+
+-- Índices (criados em todas as partições). A chave primária (station_id,
+-- data_hora) atende filtros por estação. O BRIN atende janelas de tempo: cada
+-- arquivo (estação-ano) é gravado em ordem cronológica, então faixas de 16
+-- páginas (~2 meses de uma estação) têm mínimo/máximo estreitos. O B-tree em
+-- data_hora serve leituras ordenadas (ORDER BY data_hora LIMIT n), que
+-- percorrem as partições em ordem sem ordenar a tabela inteira.
+CREATE INDEX IF NOT EXISTS idx_weather_hourly_data_hora_brin ON weather_hourly
+    USING BRIN (data_hora) WITH (pages_per_range = 16);
 CREATE INDEX IF NOT EXISTS idx_weather_hourly_data_hora ON weather_hourly(data_hora);
-CREATE INDEX IF NOT EXISTS idx_weather_hourly_estacao ON weather_hourly(estacao);
-CREATE INDEX IF NOT EXISTS idx_weather_hourly_cidade ON weather_hourly(cidade);
-CREATE INDEX IF NOT EXISTS idx_weather_hourly_ano ON weather_hourly(ano);
 CREATE INDEX IF NOT EXISTS idx_weather_hourly_ano_mes ON weather_hourly(ano, mes);
+CREATE INDEX IF NOT EXISTS idx_weather_hourly_arquivo_origem ON weather_hourly(arquivo_origem);
+
+-- Registros horários com o nome da estação (colunas de antes da dimensão stations)
+CREATE OR REPLACE VIEW weather_hourly_stations AS
+SELECT h.*, s.estacao, s.nome AS cidade, s.uf AS estado
+FROM weather_hourly h
+JOIN stations s ON s.station_id = h.station_id;
+
+-- Intervalos em que a estação não registrou nenhuma medição. As linhas
+-- vazias dos CSVs do INMET são descartadas na leitura
+-- (weather.parsing.drop_empty_rows) e ficam registradas aqui, uma linha por
+-- interrupção, em vez de uma linha por hora em weather_hourly
+CREATE TABLE IF NOT EXISTS station_outages (
+    station_id SMALLINT NOT NULL REFERENCES stations(station_id),
+    inicio TIMESTAMP NOT NULL,
+    fim TIMESTAMP NOT NULL,
+    horas INTEGER NOT NULL,
+    arquivo_origem VARCHAR(255),
+    PRIMARY KEY (station_id, inicio)
+);
+
+CREATE INDEX IF NOT EXISTS idx_station_outages_arquivo_origem ON station_outages(arquivo_origem);
 
 -- Tabela para dados processados/agregados
 CREATE TABLE IF NOT EXISTS weather_daily (
@@ -57,13 +116,28 @@ CREATE TABLE IF NOT EXISTS file_metadata (
     id SERIAL PRIMARY KEY,
     filename VARCHAR(255) UNIQUE NOT NULL,
     bucket VARCHAR(50),
+    etag VARCHAR(100),
     file_size BIGINT,
     records_count INTEGER,
     status VARCHAR(50) DEFAULT 'pending',
+    schema_version SMALLINT,
     processed_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Índice dos uploads do /upload: nome do arquivo enviado -> conteúdo (SHA-256)
+-- e objeto endereçado por conteúdo no bucket raw (sha256/<xx>/<hash>.csv)
+CREATE TABLE IF NOT EXISTS raw_file_index (
+    original_filename VARCHAR(255) PRIMARY KEY,
+    content_sha256 CHAR(64) NOT NULL,
+    object_key VARCHAR(255) NOT NULL,
+    upload_count INTEGER NOT NULL DEFAULT 1,
+    first_uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_raw_file_index_content ON raw_file_index(content_sha256);
+
 -- Tabela para modelos ML versionados
 CREATE TABLE IF NOT EXISTS ml_models (
     id SERIAL PRIMARY KEY,
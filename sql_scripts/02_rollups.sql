@@ -0,0 +1,143 @@
+-- Rollups de weather_hourly (agregados parciais combináveis)
+-- Banco: weather_db
+--
+-- Cada tabela guarda, por grupo, soma, contagem, mínimo e máximo de cada
+-- medição, então médias de períodos maiores são calculadas somando os grupos
+-- (SUM(x_soma) / SUM(x_n)) sem voltar aos registros horários. As tabelas são
+-- atualizadas de forma incremental por refresh_rollups (notebooks/utils.py)
+-- após cada carga; consultas devem passar por query_aggregate, que escolhe o
+-- rollup mais grosso capaz de responder.
+--
+-- Em bancos já existentes, aplicar com:
+--   psql -U postgres -d weather_db -f sql_scripts/02_rollups.sql
+-- e popular a partir dos dados atuais com utils.rebuild_rollups()
+
+-- Por estação e mês
+CREATE TABLE IF NOT EXISTS weather_monthly (
+    estacao VARCHAR(50) NOT NULL,
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    n_registros INTEGER,
+    temperatura_soma DOUBLE PRECISION,
+    temperatura_n INTEGER,
+    temperatura_min DOUBLE PRECISION,
+    temperatura_max DOUBLE PRECISION,
+    umidade_relativa_soma DOUBLE PRECISION,
+    umidade_relativa_n INTEGER,
+    umidade_relativa_min DOUBLE PRECISION,
+    umidade_relativa_max DOUBLE PRECISION,
+    pressao_atmosferica_soma DOUBLE PRECISION,
+    pressao_atmosferica_n INTEGER,
+    pressao_atmosferica_min DOUBLE PRECISION,
+    pressao_atmosferica_max DOUBLE PRECISION,
+    velocidade_vento_soma DOUBLE PRECISION,
+    velocidade_vento_n INTEGER,
+    velocidade_vento_min DOUBLE PRECISION,
+    velocidade_vento_max DOUBLE PRECISION,
+    radiacao_solar_soma DOUBLE PRECISION,
+    radiacao_solar_n INTEGER,
+    radiacao_solar_min DOUBLE PRECISION,
+    radiacao_solar_max DOUBLE PRECISION,
+    precipitacao_soma DOUBLE PRECISION,
+    precipitacao_n INTEGER,
+    precipitacao_min DOUBLE PRECISION,
+    precipitacao_max DOUBLE PRECISION,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (estacao, ano, mes)
+);
+
+-- Por estação e semana (ISO, começando na segunda-feira)
+CREATE TABLE IF NOT EXISTS weather_weekly (
+    estacao VARCHAR(50) NOT NULL,
+    semana DATE NOT NULL,          -- segunda-feira que inicia a semana
+    n_registros INTEGER,
+    temperatura_soma DOUBLE PRECISION,
+    temperatura_n INTEGER,
+    temperatura_min DOUBLE PRECISION,
+    temperatura_max DOUBLE PRECISION,
+    umidade_relativa_soma DOUBLE PRECISION,
+    umidade_relativa_n INTEGER,
+    umidade_relativa_min DOUBLE PRECISION,
+    umidade_relativa_max DOUBLE PRECISION,
+    pressao_atmosferica_soma DOUBLE PRECISION,
+    pressao_atmosferica_n INTEGER,
+    pressao_atmosferica_min DOUBLE PRECISION,
+    pressao_atmosferica_max DOUBLE PRECISION,
+    velocidade_vento_soma DOUBLE PRECISION,
+    velocidade_vento_n INTEGER,
+    velocidade_vento_min DOUBLE PRECISION,
+    velocidade_vento_max DOUBLE PRECISION,
+    radiacao_solar_soma DOUBLE PRECISION,
+    radiacao_solar_n INTEGER,
+    radiacao_solar_min DOUBLE PRECISION,
+    radiacao_solar_max DOUBLE PRECISION,
+    precipitacao_soma DOUBLE PRECISION,
+    precipitacao_n INTEGER,
+    precipitacao_min DOUBLE PRECISION,
+    precipitacao_max DOUBLE PRECISION,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (estacao, semana)
+);
+
+-- Ciclo diário: por estação, mês e hora do dia (base da climatologia)
+CREATE TABLE IF NOT EXISTS weather_hourly_profile (
+    estacao VARCHAR(50) NOT NULL,
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    hora INTEGER NOT NULL,
+    n_registros INTEGER,
+    temperatura_soma DOUBLE PRECISION,
+    temperatura_n INTEGER,
+    temperatura_min DOUBLE PRECISION,
+    temperatura_max DOUBLE PRECISION,
+    umidade_relativa_soma DOUBLE PRECISION,
+    umidade_relativa_n INTEGER,
+    umidade_relativa_min DOUBLE PRECISION,
+    umidade_relativa_max DOUBLE PRECISION,
+    pressao_atmosferica_soma DOUBLE PRECISION,
+    pressao_atmosferica_n INTEGER,
+    pressao_atmosferica_min DOUBLE PRECISION,
+    pressao_atmosferica_max DOUBLE PRECISION,
+    velocidade_vento_soma DOUBLE PRECISION,
+    velocidade_vento_n INTEGER,
+    velocidade_vento_min DOUBLE PRECISION,
+    velocidade_vento_max DOUBLE PRECISION,
+    radiacao_solar_soma DOUBLE PRECISION,
+    radiacao_solar_n INTEGER,
+    radiacao_solar_min DOUBLE PRECISION,
+    radiacao_solar_max DOUBLE PRECISION,
+    precipitacao_soma DOUBLE PRECISION,
+    precipitacao_n INTEGER,
+    precipitacao_min DOUBLE PRECISION,
+    precipitacao_max DOUBLE PRECISION,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (estacao, ano, mes, hora)
+);
+
+-- Climatologia hora do dia x mês por estação, combinando todos os anos
+CREATE OR REPLACE VIEW weather_climatology AS
+SELECT
+    estacao,
+    mes,
+    hora,
+    COUNT(*) AS anos,
+    SUM(temperatura_soma) / NULLIF(SUM(temperatura_n), 0) AS temperatura_media,
+    MIN(temperatura_min) AS temperatura_min,
+    MAX(temperatura_max) AS temperatura_max,
+    SUM(umidade_relativa_soma) / NULLIF(SUM(umidade_relativa_n), 0) AS umidade_relativa_media,
+    MIN(umidade_relativa_min) AS umidade_relativa_min,
+    MAX(umidade_relativa_max) AS umidade_relativa_max,
+    SUM(pressao_atmosferica_soma) / NULLIF(SUM(pressao_atmosferica_n), 0) AS pressao_atmosferica_media,
+    MIN(pressao_atmosferica_min) AS pressao_atmosferica_min,
+    MAX(pressao_atmosferica_max) AS pressao_atmosferica_max,
+    SUM(velocidade_vento_soma) / NULLIF(SUM(velocidade_vento_n), 0) AS velocidade_vento_media,
+    MIN(velocidade_vento_min) AS velocidade_vento_min,
+    MAX(velocidade_vento_max) AS velocidade_vento_max,
+    SUM(radiacao_solar_soma) / NULLIF(SUM(radiacao_solar_n), 0) AS radiacao_solar_media,
+    MIN(radiacao_solar_min) AS radiacao_solar_min,
+    MAX(radiacao_solar_max) AS radiacao_solar_max,
+    SUM(precipitacao_soma) / NULLIF(SUM(precipitacao_n), 0) AS precipitacao_media,
+    MIN(precipitacao_min) AS precipitacao_min,
+    MAX(precipitacao_max) AS precipitacao_max
+FROM weather_hourly_profile
+GROUP BY estacao, mes, hora;
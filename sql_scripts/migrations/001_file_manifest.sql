@@ -0,0 +1,7 @@
+-- Migração para bancos criados antes do manifesto de arquivos processados
+-- (o 01_create_tables.sql já cria essas estruturas em bancos novos)
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/001_file_manifest.sql
+
+ALTER TABLE file_metadata ADD COLUMN IF NOT EXISTS etag VARCHAR(100);
+
+CREATE INDEX IF NOT EXISTS idx_weather_hourly_arquivo_origem ON weather_hourly(arquivo_origem);
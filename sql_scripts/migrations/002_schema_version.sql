@@ -0,0 +1,6 @@
+-- Migração para bancos criados antes do esquema versionado de limpeza
+-- (notebooks/weather/schema.py). Arquivos sem versão registrada são
+-- reprocessados na próxima carga incremental.
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/002_schema_version.sql
+
+ALTER TABLE file_metadata ADD COLUMN IF NOT EXISTS schema_version SMALLINT;
@@ -0,0 +1,10 @@
+-- Migração para a agregação diária incremental (refresh_weather_daily em utils.py):
+-- os dias afetados por um arquivo são recalculados a partir de weather_hourly
+-- por (estacao, data_hora)
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/003_weather_daily_incremental.sql
+
+CREATE INDEX IF NOT EXISTS idx_weather_hourly_estacao_data_hora ON weather_hourly(estacao, data_hora);
+
+-- Bancos em que weather_daily foi recriada pelo antigo to_sql(if_exists='replace')
+-- perderam a restrição UNIQUE(data, estacao) usada no ON CONFLICT
+CREATE UNIQUE INDEX IF NOT EXISTS weather_daily_data_estacao_key ON weather_daily(data, estacao);
@@ -0,0 +1,18 @@
+-- Migração para os tipos compactos de weather_hourly (COMPACT_DTYPES em
+-- notebooks/weather/schema.py): medições em REAL (4 bytes) no lugar de
+-- DECIMAL e partes da data em SMALLINT (2 bytes) no lugar de INTEGER.
+-- Reescreve a tabela (e os índices) uma vez; execute fora do horário de carga.
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/004_compact_types.sql
+
+ALTER TABLE weather_hourly
+    ALTER COLUMN temperatura TYPE REAL,
+    ALTER COLUMN umidade_relativa TYPE REAL,
+    ALTER COLUMN pressao_atmosferica TYPE REAL,
+    ALTER COLUMN direcao_vento TYPE REAL,
+    ALTER COLUMN velocidade_vento TYPE REAL,
+    ALTER COLUMN radiacao_solar TYPE REAL,
+    ALTER COLUMN precipitacao TYPE REAL,
+    ALTER COLUMN ano TYPE SMALLINT,
+    ALTER COLUMN mes TYPE SMALLINT,
+    ALTER COLUMN dia TYPE SMALLINT,
+    ALTER COLUMN hora TYPE SMALLINT;
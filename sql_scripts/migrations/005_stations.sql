@@ -0,0 +1,52 @@
+-- Migração para a dimensão stations: weather_hourly passa a referenciar a
+-- estação por station_id (SMALLINT) em vez de repetir estacao/cidade/estado.
+-- As estações existentes são criadas a partir dos próprios registros; os
+-- metadados do cabeçalho (código WMO, coordenadas...) são preenchidos na
+-- próxima carga de cada estação.
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/005_stations.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS stations (
+    station_id SMALLSERIAL PRIMARY KEY,
+    estacao VARCHAR(50) UNIQUE NOT NULL,
+    codigo_wmo VARCHAR(10) UNIQUE,
+    nome VARCHAR(100),
+    uf CHAR(2),
+    regiao VARCHAR(5),
+    latitude REAL,
+    longitude REAL,
+    altitude REAL,
+    data_fundacao DATE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO stations (estacao, nome, uf)
+SELECT COALESCE(estacao, 'desconhecida'), MAX(cidade), MAX(estado)
+FROM weather_hourly
+GROUP BY 1
+ON CONFLICT (estacao) DO NOTHING;
+
+ALTER TABLE weather_hourly ADD COLUMN IF NOT EXISTS station_id SMALLINT REFERENCES stations(station_id);
+
+UPDATE weather_hourly h
+SET station_id = s.station_id
+FROM stations s
+WHERE s.estacao = COALESCE(h.estacao, 'desconhecida');
+
+ALTER TABLE weather_hourly ALTER COLUMN station_id SET NOT NULL;
+
+DROP VIEW IF EXISTS weather_hourly_stations;
+ALTER TABLE weather_hourly
+    DROP COLUMN IF EXISTS estacao,
+    DROP COLUMN IF EXISTS cidade,
+    DROP COLUMN IF EXISTS estado;
+
+CREATE INDEX IF NOT EXISTS idx_weather_hourly_station_data_hora ON weather_hourly(station_id, data_hora);
+
+CREATE OR REPLACE VIEW weather_hourly_stations AS
+SELECT h.*, s.estacao, s.nome AS cidade, s.uf AS estado
+FROM weather_hourly h
+JOIN stations s ON s.station_id = h.station_id;
+
+COMMIT;
@@ -0,0 +1,127 @@
+-- Migração de weather_hourly para a tabela particionada por ano, com chave
+-- primária (station_id, data_hora) e BRIN em data_hora (ver
+-- sql_scripts/01_create_tables.sql). Requer a 005_stations.sql.
+-- Os dados são copiados para as novas partições; registros repetidos na
+-- mesma (station_id, data_hora) mantêm o mais recente (maior id ou, em
+-- tabelas criadas pelo pandas to_sql, sem id, o maior ingestion_date e a
+-- última posição física). Só as colunas presentes nas duas tabelas são
+-- copiadas.
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/006_partition_weather_hourly.sql
+
+BEGIN;
+
+DROP VIEW IF EXISTS weather_hourly_stations;
+
+-- A tabela antiga sai do caminho (os nomes dos índices são reaproveitados)
+ALTER TABLE weather_hourly RENAME TO weather_hourly_old;
+DO $$
+BEGIN
+    -- Tabelas criadas pelo to_sql não têm chave primária
+    IF EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'weather_hourly_pkey' AND conrelid = 'weather_hourly_old'::regclass
+    ) THEN
+        ALTER TABLE weather_hourly_old RENAME CONSTRAINT weather_hourly_pkey TO weather_hourly_old_pkey;
+    END IF;
+END $$;
+DROP INDEX IF EXISTS idx_weather_hourly_data_hora;
+DROP INDEX IF EXISTS idx_weather_hourly_ano;
+DROP INDEX IF EXISTS idx_weather_hourly_ano_mes;
+DROP INDEX IF EXISTS idx_weather_hourly_arquivo_origem;
+DROP INDEX IF EXISTS idx_weather_hourly_station_data_hora;
+
+CREATE TABLE weather_hourly (
+    station_id SMALLINT NOT NULL REFERENCES stations(station_id),
+    data_hora TIMESTAMP NOT NULL,
+    temperatura REAL,
+    umidade_relativa REAL,
+    pressao_atmosferica REAL,
+    direcao_vento REAL,
+    velocidade_vento REAL,
+    radiacao_solar REAL,
+    precipitacao REAL,
+    ano SMALLINT,
+    mes SMALLINT,
+    dia SMALLINT,
+    hora SMALLINT,
+    arquivo_origem VARCHAR(255),
+    ingestion_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (station_id, data_hora)
+) PARTITION BY RANGE (data_hora);
+
+CREATE OR REPLACE FUNCTION create_weather_hourly_partition(p_ano INTEGER) RETURNS VOID AS $$
+BEGIN
+    -- Serializa cargas concorrentes criando a mesma partição
+    PERFORM pg_advisory_xact_lock(hashtext('weather_hourly_partition'));
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF weather_hourly FOR VALUES FROM (%L) TO (%L)',
+        'weather_hourly_' || p_ano, make_date(p_ano, 1, 1), make_date(p_ano + 1, 1, 1)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partições para os anos já carregados e os padrão de 01_create_tables.sql
+SELECT create_weather_hourly_partition(ano)
+FROM (
+    SELECT generate_series(2020, 2026) AS ano
+    UNION
+    SELECT DISTINCT CAST(EXTRACT(YEAR FROM data_hora) AS INTEGER) FROM weather_hourly_old
+    WHERE data_hora IS NOT NULL
+) anos;
+
+CREATE TABLE weather_hourly_default PARTITION OF weather_hourly DEFAULT;
+
+-- Cópia em ordem de estação e data (os blocos do BRIN ficam bem delimitados)
+DO $$
+DECLARE
+    colunas TEXT;
+    recente TEXT := 'ctid DESC';
+BEGIN
+    SELECT string_agg(quote_ident(n.column_name), ', ' ORDER BY n.ordinal_position)
+    INTO colunas
+    FROM information_schema.columns n
+    JOIN information_schema.columns o
+      ON o.table_schema = n.table_schema
+     AND o.table_name = 'weather_hourly_old'
+     AND o.column_name = n.column_name
+    WHERE n.table_schema = current_schema() AND n.table_name = 'weather_hourly';
+
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'weather_hourly_old' AND column_name = 'id'
+    ) THEN
+        recente := 'id DESC';
+    ELSIF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'weather_hourly_old' AND column_name = 'ingestion_date'
+    ) THEN
+        recente := 'ingestion_date DESC NULLS LAST, ctid DESC';
+    END IF;
+
+    EXECUTE format(
+        'INSERT INTO weather_hourly (%s)
+         SELECT DISTINCT ON (station_id, data_hora) %s
+         FROM weather_hourly_old
+         WHERE data_hora IS NOT NULL
+         ORDER BY station_id, data_hora, %s',
+        colunas, colunas, recente
+    );
+END $$;
+
+DROP TABLE weather_hourly_old;
+
+CREATE INDEX idx_weather_hourly_data_hora_brin ON weather_hourly
+    USING BRIN (data_hora) WITH (pages_per_range = 16);
+CREATE INDEX idx_weather_hourly_data_hora ON weather_hourly(data_hora);
+CREATE INDEX idx_weather_hourly_ano_mes ON weather_hourly(ano, mes);
+CREATE INDEX idx_weather_hourly_arquivo_origem ON weather_hourly(arquivo_origem);
+
+CREATE VIEW weather_hourly_stations AS
+SELECT h.*, s.estacao, s.nome AS cidade, s.uf AS estado
+FROM weather_hourly h
+JOIN stations s ON s.station_id = h.station_id;
+
+COMMIT;
+
+ANALYZE weather_hourly;
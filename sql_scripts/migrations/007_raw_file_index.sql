@@ -0,0 +1,17 @@
+-- Migração para bancos criados antes dos uploads endereçados por conteúdo
+-- (o 01_create_tables.sql já cria essas estruturas em bancos novos)
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/007_raw_file_index.sql
+--
+-- Objetos antigos do raw/ (upload_<timestamp>_<arquivo>) continuam válidos;
+-- apenas os novos envios pelo /upload usam sha256/<xx>/<hash>.csv
+
+CREATE TABLE IF NOT EXISTS raw_file_index (
+    original_filename VARCHAR(255) PRIMARY KEY,
+    content_sha256 CHAR(64) NOT NULL,
+    object_key VARCHAR(255) NOT NULL,
+    upload_count INTEGER NOT NULL DEFAULT 1,
+    first_uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_raw_file_index_content ON raw_file_index(content_sha256);
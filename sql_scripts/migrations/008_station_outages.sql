@@ -0,0 +1,17 @@
+-- Migração para os intervalos sem medição (station_outages). Com
+-- SCHEMA_VERSION 3, as linhas sem nenhuma medição dos CSVs deixam de ir para
+-- weather_hourly: a próxima carga incremental reprocessa todos os arquivos,
+-- substitui os registros de cada um e registra as interrupções aqui.
+-- Requer a 005_stations.sql.
+-- Aplicar com: psql -U postgres -d weather_db -f sql_scripts/migrations/008_station_outages.sql
+
+CREATE TABLE IF NOT EXISTS station_outages (
+    station_id SMALLINT NOT NULL REFERENCES stations(station_id),
+    inicio TIMESTAMP NOT NULL,
+    fim TIMESTAMP NOT NULL,
+    horas INTEGER NOT NULL,
+    arquivo_origem VARCHAR(255),
+    PRIMARY KEY (station_id, inicio)
+);
+
+CREATE INDEX IF NOT EXISTS idx_station_outages_arquivo_origem ON station_outages(arquivo_origem);
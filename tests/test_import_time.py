@@ -0,0 +1,29 @@
+"""
+Regressão: importar notebooks/utils.py (e o pacote weather) não carrega as
+dependências pesadas, que só entram no primeiro uso (ver
+scripts/check_import_time.py para o tempo de cada importação)
+
+    python -m pytest tests
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+NOTEBOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notebooks")
+HEAVY_MODULES = ["pandas", "pyarrow", "boto3", "sqlalchemy"]
+
+
+@pytest.mark.parametrize("module", ["utils", "weather"])
+def test_import_is_light(module):
+    # Processo novo: os testes deste mesmo processo já importam pandas
+    code = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=NOTEBOOKS_DIR, capture_output=True, text=True, check=True
+    )
+    assert json.loads(result.stdout) == []
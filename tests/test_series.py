@@ -0,0 +1,85 @@
+"""
+Testes de weather.series.StationSeries
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Pacote compartilhado em notebooks/weather
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notebooks"))
+
+from weather.series import StationSeries
+
+
+@pytest.fixture
+def series():
+    df = pd.DataFrame({
+        "estacao": ["recife"] * 6,
+        "data_hora": pd.date_range("2023-01-01", periods=6, freq="h"),
+        "temperatura": [20.0, 21.0, np.nan, 23.0, 24.0, 25.0],
+    })
+    return StationSeries.from_frame(df)
+
+
+@pytest.mark.parametrize("window", [0, -1, -6, 1.5, True])
+def test_rolling_rejects_invalid_window(series, window):
+    with pytest.raises(ValueError):
+        series.rolling("temperatura", window)
+
+
+def test_rolling_matches_pandas(series):
+    expected = pd.Series(series["temperatura"][0]).rolling(3, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(series.rolling("temperatura", 3)[0], expected, rtol=1e-6)
+    np.testing.assert_array_equal(series.rolling("temperatura", 1)[0], series["temperatura"][0])
+
+
+def test_interpolate_fills_gaps_up_to_max_gap():
+    df = pd.DataFrame({
+        "estacao": ["recife"] * 8,
+        "data_hora": pd.to_datetime([
+            "2023-01-01 00:00", "2023-01-01 02:00", "2023-01-01 03:00", "2023-01-01 07:00",
+            "2023-01-01 08:00", "2023-01-01 09:00", "2023-01-01 10:00", "2023-01-01 11:00",
+        ]),
+        "temperatura": [20.0, 22.0, 23.0, 27.0, 28.0, 29.0, np.nan, 31.0],
+    })
+    series = StationSeries.from_frame(df)
+    result = series.interpolate("temperatura", max_gap=1)[0]
+
+    # 01h e 10h (lacunas de 1 hora) são preenchidas; 04h-06h (3 horas) não
+    assert result[1] == pytest.approx(21.0)
+    assert result[10] == pytest.approx(30.0)
+    assert np.isnan(result[4:7]).all()
+    np.testing.assert_allclose(series.interpolate("temperatura", max_gap=3)[0][4:7], [24.0, 25.0, 26.0])
+
+
+@pytest.mark.parametrize("max_gap", [-1, 1.5, True])
+def test_interpolate_rejects_invalid_max_gap(series, max_gap):
+    with pytest.raises(ValueError):
+        series.interpolate("temperatura", max_gap=max_gap)
+
+
+def test_resample_daily_matches_pandas():
+    data_hora = pd.date_range("2023-01-01 12:00", periods=60, freq="h")
+    df = pd.DataFrame({
+        "estacao": ["recife"] * 60 + ["caruaru"] * 60,
+        "data_hora": np.tile(data_hora, 2),
+        "temperatura": np.arange(120, dtype=float),
+    })
+    df.loc[5:20, "temperatura"] = np.nan
+    periods, values = StationSeries.from_frame(df).resample("D", how="mean")
+
+    expected = df.set_index("data_hora").groupby("estacao")["temperatura"].resample("D").mean().unstack()
+    np.testing.assert_array_equal(periods, expected.columns.to_numpy())
+    np.testing.assert_allclose(values["temperatura"], expected.loc[["caruaru", "recife"]].to_numpy(), rtol=1e-6)
+
+
+def test_resample_min_count(series):
+    _, values = series.resample("D", how="count")
+    assert values["temperatura"][0, 0] == 5
+    _, values = series.resample("D", min_count=6)
+    assert np.isnan(values["temperatura"][0, 0])